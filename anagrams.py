@@ -0,0 +1,100 @@
+# anagrams.py
+import re
+from collections import Counter
+
+
+# Signal words the clue prompt suggests for anagram clues, plus common variants.
+ANAGRAM_INDICATORS = ("mixed", "aimless", "fractured", "scrambled", "jumbled", "shuffled", "broken",
+                      "confused", "rearranged", "messy", "wild", "crazy", "twisted", "tangled",
+                      "anagram", "reworked", "reordered", "mangled", "disordered")
+
+
+def anagram_signature(word):
+    """
+    Returns the sorted letters of a word, which all of its anagrams share.
+    """
+    return ''.join(sorted(word.upper()))
+
+def build_anagram_index(word_dict, complexity=0):
+    """
+    Builds a sorted-letter signature index over the word list.
+
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, only words scoring above this are indexed.
+    :return: Dictionary mapping each signature to its words, best-scoring first.
+    """
+    scored = {}
+    for word_list in word_dict.values():
+        for word, points in word_list:
+            if points > complexity and points > scored.get(word, -1):
+                scored[word] = points
+
+    index = {}
+    for word in sorted(scored, key=lambda w: (-scored[w], w)):
+        index.setdefault(anagram_signature(word), []).append(word)
+    return index
+
+def find_anagrams(index, word):
+    """
+    Looks up the dictionary anagrams of a word, excluding the word itself.
+
+    :return: List of words, best-scoring first.
+    """
+    word = word.upper()
+    return [other for other in index.get(anagram_signature(word), []) if other != word]
+
+def anagram_hint(index, word, limit=5):
+    """
+    Builds the prompt sentence that tells the model which anagrams it may use.
+    """
+    anagrams = find_anagrams(index, word)[:limit]
+    if anagrams:
+        return f" Dictionary anagrams of {word}: {', '.join(anagrams)}. Only use one of these for an anagram clue."
+    return f" {word} has no dictionary anagrams, so do not write an anagram clue."
+
+def validate_anagram_clue(index, word, clue):
+    """
+    Checks the anagram in a clue, if it has one, against the index.
+
+    A clue counts as an anagram clue when a run of its words spells the answer's
+    letters, or when an anagram indicator sits right next to a run of the answer's
+    length that misses its letters by at most one (a miscopied anagram). An indicator
+    on its own proves nothing: "Wild West gangster" is an ordinary clue for HOOD. An
+    anagram clue is valid only if one of its runs is a single dictionary word other
+    than the answer.
+
+    :return: Boolean, False for an anagram clue with a missing or made-up anagram.
+    """
+    word = word.upper()
+    signature = anagram_signature(word)
+    tokens = [token.upper() for token in re.findall(r"[A-Za-z]+", clue)]
+    indicators = [token.lower() in ANAGRAM_INDICATORS for token in tokens]
+    answer_letters = Counter(word)
+
+    anagram_clue = False
+    for start in range(len(tokens)):
+        letters = ''
+        for end in range(start, len(tokens)):
+            letters += tokens[end]
+            if len(letters) > len(word):
+                break
+            if len(letters) < len(word):
+                continue
+            if anagram_signature(letters) == signature:
+                anagram_clue = True
+                if end == start and letters != word and letters in index.get(signature, []):
+                    return True
+            else:
+                flagged = (start > 0 and indicators[start - 1]) or (end + 1 < len(tokens) and indicators[end + 1])
+                if flagged and sum((Counter(letters) - answer_letters).values()) <= 1:
+                    anagram_clue = True
+
+    return not anagram_clue
+
+
+if __name__ == '__main__':
+    from demo import build_word_dictionary
+
+    anagram_index = build_anagram_index(build_word_dictionary('spreadthewordlist_caps.dict'), 25)
+    for answer in ["HOOD", "STEAL", "LISTEN", "QUIZ"]:
+        print(answer, find_anagrams(anagram_index, answer)[:8])
@@ -0,0 +1,145 @@
+# answer_history.py
+import sqlite3
+import threading
+import time
+
+from validate import grid_entries
+
+
+## HISTORY
+
+class AnswerHistory:
+    """
+    Persistent record in SQLite of the answers of published puzzles, so new fills can
+    avoid answers that ran recently.
+
+    The window is the last window_puzzles puzzles and/or the puzzles published in the
+    last window_days days; expire() deletes older puzzles for good. recent() returns
+    the set of answers in the window, to pass as exclude to iter_fills (which turns it
+    into candidate masks once) or fill_grid_sam. It is rebuilt only after the history
+    changes or the day rolls over.
+    """
+
+    def __init__(self, path="answers.sqlite", window_puzzles=None, window_days=30):
+        self.path = path
+        self.window_puzzles = window_puzzles
+        self.window_days = window_days
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.cached = None
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS puzzles ("
+                " id INTEGER PRIMARY KEY, name TEXT UNIQUE, published REAL NOT NULL)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers (puzzle INTEGER NOT NULL, answer TEXT NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS answers_puzzle ON answers (puzzle)")
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, grid, name=None, published=None):
+        """
+        Records the answers of a published puzzle; recording a name again replaces its answers.
+
+        :param grid: Filled grid (2D list or list of row strings).
+        :param name: Optional unique name of the puzzle, such as its date.
+        :param published: Optional publication time in seconds since the epoch, now by default.
+        :return: Integer number of answers recorded.
+        """
+        across, down = grid_entries(grid)
+        answers = sorted(set(across + down))
+        published = time.time() if published is None else published
+        with self.lock, self.connection:
+            if name is not None:
+                self.connection.execute(
+                    "DELETE FROM answers WHERE puzzle IN (SELECT id FROM puzzles WHERE name = ?)", (name,))
+                self.connection.execute("DELETE FROM puzzles WHERE name = ?", (name,))
+            puzzle = self.connection.execute("INSERT INTO puzzles (name, published) VALUES (?, ?)",
+                                             (name, published)).lastrowid
+            self.connection.executemany("INSERT INTO answers VALUES (?, ?)",
+                                        [(puzzle, answer) for answer in answers])
+            self.cached = None
+        return len(answers)
+
+    def window(self, now=None):
+        """
+        Returns the WHERE clause and parameters selecting the puzzles inside the window.
+        """
+        clauses = []
+        params = []
+        if self.window_days is not None:
+            clauses.append("published >= ?")
+            params.append((time.time() if now is None else now) - self.window_days * 86400)
+        if self.window_puzzles is not None:
+            clauses.append("id IN (SELECT id FROM puzzles ORDER BY published DESC, id DESC LIMIT ?)")
+            params.append(self.window_puzzles)
+        return " AND ".join(clauses) or "1", params
+
+    def recent(self, now=None):
+        """
+        Returns the frozenset of answers used by the puzzles in the window.
+        """
+        day = int((time.time() if now is None else now) // 86400)
+        cached = self.cached
+        if cached is not None and cached[0] == day:
+            return cached[1]
+        where, params = self.window(now)
+        with self.lock:
+            answers = frozenset(answer for answer, in self.connection.execute(
+                f"SELECT DISTINCT answer FROM answers WHERE puzzle IN (SELECT id FROM puzzles WHERE {where})",
+                params))
+        self.cached = (day, answers)
+        return answers
+
+    def expire(self, now=None):
+        """
+        Deletes the puzzles outside the window and their answers.
+
+        :return: Integer number of puzzles deleted.
+        """
+        where, params = self.window(now)
+        with self.lock, self.connection:
+            old = [puzzle for puzzle, in self.connection.execute(
+                f"SELECT id FROM puzzles WHERE NOT ({where})", params)]
+            self.connection.executemany("DELETE FROM answers WHERE puzzle = ?", [(puzzle,) for puzzle in old])
+            self.connection.executemany("DELETE FROM puzzles WHERE id = ?", [(puzzle,) for puzzle in old])
+            self.cached = None
+        return len(old)
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import tempfile
+
+    from bench_fill import LAYOUTS
+    from demo import build_word_dictionary, create_symmetrical_grid2
+    from fill_engine import build_pattern_index, iter_fills
+
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    index = build_pattern_index(word_dict, 35)
+
+    # A month of daily puzzles, each avoiding the answers of the previous week.
+    history = AnswerHistory(os.path.join(tempfile.mkdtemp(), "answers.sqlite"), window_days=7)
+    day = 86400
+    start = time.time() - 30 * day
+    seconds = 0.0
+    for i in range(30):
+        now = start + i * day
+        recent = history.recent(now)
+        begin = time.time()
+        # Fill times are heavy-tailed, so a slow attempt is restarted with another seed.
+        fill = None
+        attempt = 0
+        while fill is None:
+            fill = next(iter_fills(create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"]), word_dict, 35, index=index,
+                                   rng=random.Random(100 * i + attempt), exclude=recent, time_limit=2), None)
+            attempt += 1
+        seconds += time.time() - begin
+        answers = set(sum(grid_entries(fill), []))
+        assert not answers & recent
+        history.record(fill, f"day {i}", now)
+    print(f"30 puzzles filled in {seconds:.2f} seconds with no answer repeated within 7 days")
+    print(len(history.recent()), "answers in the window;", history.expire(), "puzzles expired")
+
@@ -0,0 +1,84 @@
+# bench_clues.py
+import argparse
+import os
+import random
+import time
+
+from openai import OpenAI
+
+from demo import build_word_dictionary, create_clues, create_symmetrical_grid2, print_and_store_word_lists
+from fill_engine import fill_grid_constrained
+from mock_llm import MockLLM, start_mock_server
+from telemetry import ClueTelemetry
+
+
+MODES = {
+    "sequential": {},
+    "concurrent": {"concurrency": 8},
+    "batched": {"batch_size": 10},
+    "batched+concurrent": {"batch_size": 10, "concurrency": 4},
+}
+
+
+def benchmark_grid(seed=0):
+    """
+    Fills the wednesday_demo layout to get a realistic 15x15 word list.
+    """
+    grid = create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"])
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    grid, _ = fill_grid_constrained(grid, word_dict, 35, rng=random.Random(seed))
+    return print_and_store_word_lists(grid)
+
+def run_benchmark(numbered_words, base_url, modes=MODES, repeats=1, max_retries=3):
+    """
+    Clues the same word list in every mode against the server at base_url.
+
+    :return: Dictionary keyed by mode with wall time, clue throughput and the
+             telemetry summary of the requests made.
+    """
+    word_count = len(numbered_words["Across"]) + len(numbered_words["Down"])
+    client = OpenAI(base_url=base_url, api_key=os.environ.get("OPENAI_API_KEY", "mock"), max_retries=0)
+    results = {}
+    for mode, options in modes.items():
+        telemetry = ClueTelemetry()
+        st = time.time()
+        for _ in range(repeats):
+            create_clues(numbered_words, "gpt-3.5-turbo", telemetry=telemetry, max_retries=max_retries,
+                         client=client, **options)
+        elapsed = time.time() - st
+        results[mode] = {
+            "seconds": elapsed,
+            "clues_per_second": word_count * repeats / elapsed,
+            "requests": telemetry.summary().get("gpt-3.5-turbo", {}),
+        }
+    return results
+
+def print_results(results):
+    print(f"{'mode':<20} {'seconds':>8} {'clues/s':>8} {'requests':>9} {'p50':>6} {'p95':>6} {'max':>6} {'retries':>8}")
+    for mode, result in results.items():
+        requests = result["requests"]
+        print(f"{mode:<20} {result['seconds']:>8.2f} {result['clues_per_second']:>8.2f} "
+              f"{requests.get('requests', 0):>9} {requests.get('latency_p50', 0):>6.2f} "
+              f"{requests.get('latency_p95', 0):>6.2f} {requests.get('latency_max', 0):>6.2f} "
+              f"{requests.get('retries', 0):>8}")
+
+
+if __name__ == '__main__':
+    from bench_fill import LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Clue throughput benchmark against the mock LLM server")
+    parser.add_argument("--distribution", default="lognormal")
+    parser.add_argument("--mean", type=float, default=0.3)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockLLM(args.distribution, args.mean, args.spread, args.rate_limit_rate, args.error_rate, args.seed)
+    server, base_url = start_mock_server(mock)
+    numbered_words = benchmark_grid(args.seed)
+    print_results(run_benchmark(numbered_words, base_url, repeats=args.repeats))
+    print("Mock server counters:", mock.stats())
+    server.shutdown()
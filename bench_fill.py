@@ -0,0 +1,188 @@
+# bench_fill.py
+import argparse
+import csv
+import random
+import statistics
+import time
+import tracemalloc
+
+from demo import build_word_dictionary, create_symmetrical_grid2
+from fill_engine import build_pattern_index, fill_grid_constrained
+
+
+# Black squares of one half of each layout; create_symmetrical_grid2 mirrors them.
+LAYOUTS = {
+    "mini 5x7": (5, 7, [(0, 3)]),
+    "wednesday 15x15": (15, 15, [(0, 5), (0, 6), (0, 10), (1, 5), (1, 10), (2, 10), (3, 0), (3, 1), (3, 9),
+                                 (4, 4), (5, 5), (5, 6), (5, 7), (5, 8), (5, 12), (5, 13), (5, 14),
+                                 (6, 3), (6, 10)]),
+    "sunday 21x21": (21, 21, [(0, 3), (0, 7), (0, 11), (0, 15), (0, 16), (1, 7), (1, 15), (2, 15),
+                              (3, 4), (3, 5), (3, 9), (3, 10), (3, 14), (4, 3), (4, 10), (4, 11), (4, 16),
+                              (5, 3), (5, 8), (5, 13), (6, 6), (6, 7), (6, 13), (7, 6), (7, 7), (7, 12),
+                              (7, 17), (8, 9), (8, 10), (8, 14), (9, 3), (9, 4), (9, 8), (9, 14), (9, 18),
+                              (9, 19), (9, 20), (10, 0), (10, 4), (10, 5)]),
+    "jumbo 25x25": (25, 25, [(0, 0), (0, 1), (0, 8), (0, 9), (0, 14), (0, 18), (0, 24), (1, 9), (2, 9),
+                             (3, 3), (3, 4), (3, 10), (3, 16), (3, 21), (4, 4), (4, 8), (4, 12), (4, 13),
+                             (4, 17), (4, 21), (5, 0), (5, 1), (5, 6), (5, 7), (5, 8), (5, 14), (5, 19),
+                             (5, 20), (5, 24), (6, 6), (6, 11), (6, 19), (7, 3), (7, 9), (7, 10), (7, 18),
+                             (8, 3), (8, 4), (8, 5), (8, 12), (8, 17), (8, 18), (9, 8), (9, 15), (9, 16),
+                             (9, 17), (9, 23), (9, 24), (10, 0), (10, 6), (10, 7), (10, 13), (10, 19),
+                             (11, 0), (11, 1), (11, 2), (11, 9), (11, 10), (11, 19), (11, 20), (11, 21),
+                             (12, 3), (12, 12)]),
+}
+
+# What the Sunday-size case has to meet with the full word list.
+TARGETS = {
+    "sunday 21x21": {"median_seconds": 5.0, "success_rate": 0.8, "peak_mb": 250.0},
+}
+
+
+## MEASUREMENT
+
+def sample_word_dict(word_dict, fraction, rng):
+    """
+    Keeps a random fraction of every length bucket of the word list.
+    """
+    if fraction >= 1:
+        return word_dict
+    return {length: rng.sample(word_list, int(len(word_list) * fraction))
+            for length, word_list in word_dict.items()}
+
+def measure_fill(layout, word_dict, complexity, seed, time_limit, order="random"):
+    """
+    Fills a layout twice with the same seed: once for time, once under tracemalloc for memory.
+
+    :param order: Candidate order passed to the engine ('random', 'score' or 'crossing').
+    :return: Dictionary with filled, seconds, placements, backtracks and peak_mb (index build and fill).
+    """
+    rows, cols, black_squares = layout
+    index = build_pattern_index(word_dict, complexity)
+    stats = {}
+    start = time.perf_counter()
+    _, filled = fill_grid_constrained(create_symmetrical_grid2(rows, cols, black_squares), word_dict, complexity,
+                                      index=index, rng=random.Random(seed), order=order, time_limit=time_limit,
+                                      stats=stats)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    index = build_pattern_index(word_dict, complexity)
+    fill_grid_constrained(create_symmetrical_grid2(rows, cols, black_squares), word_dict, complexity,
+                          index=index, rng=random.Random(seed), order=order, time_limit=time_limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"filled": filled, "seconds": seconds, "placements": stats["placements"],
+            "backtracks": stats["backtracks"], "peak_mb": peak / 2 ** 20}
+
+def run_scaling(word_dict, layouts=LAYOUTS, fractions=(0.25, 0.5, 1.0), complexity=35, seeds=5, time_limit=30,
+                order="random"):
+    """
+    Measures fill time and peak memory for every layout and word-list fraction.
+
+    :return: List of dictionaries, one per (layout, fraction), with the layout, size (cells),
+             fraction, words (usable words indexed), success_rate, median_seconds, max_seconds,
+             median_placements, median_backtracks and peak_mb.
+    """
+    rows = []
+    for name, layout in layouts.items():
+        for fraction in fractions:
+            sampled = sample_word_dict(word_dict, fraction, random.Random(0))
+            runs = [measure_fill(layout, sampled, complexity, seed, time_limit, order) for seed in range(seeds)]
+            rows.append({
+                "layout": name,
+                "size": layout[0] * layout[1],
+                "fraction": fraction,
+                "words": sum(1 for words in sampled.values() for _, points in words if points > complexity),
+                "success_rate": sum(run["filled"] for run in runs) / seeds,
+                "median_seconds": statistics.median(run["seconds"] for run in runs),
+                "max_seconds": max(run["seconds"] for run in runs),
+                "median_placements": statistics.median(run["placements"] for run in runs),
+                "median_backtracks": statistics.median(run["backtracks"] for run in runs),
+                "peak_mb": max(run["peak_mb"] for run in runs),
+            })
+    return rows
+
+def check_targets(rows, targets=TARGETS):
+    """
+    Compares the full-word-list rows against the targets.
+
+    :return: List of (layout, metric, value, target, passed) tuples.
+    """
+    results = []
+    for name, target in targets.items():
+        matching = [row for row in rows if row["layout"] == name]
+        if not matching:
+            continue
+        row = max(matching, key=lambda r: r["fraction"])
+        results.append((name, "median_seconds", row["median_seconds"], target["median_seconds"],
+                        row["median_seconds"] <= target["median_seconds"]))
+        results.append((name, "success_rate", row["success_rate"], target["success_rate"],
+                        row["success_rate"] >= target["success_rate"]))
+        results.append((name, "peak_mb", row["peak_mb"], target["peak_mb"], row["peak_mb"] <= target["peak_mb"]))
+    return results
+
+## OUTPUT
+
+def write_csv(rows, path):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def plot_scaling(rows, path):
+    """
+    Plots median fill time and peak memory against grid size, one line per word-list fraction.
+    Needs matplotlib; returns False without it so the caller can fall back to the CSV.
+    """
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+
+    figure, (time_axis, memory_axis) = plt.subplots(1, 2, figsize=(11, 4))
+    for fraction in sorted({row["fraction"] for row in rows}):
+        series = sorted((row for row in rows if row["fraction"] == fraction), key=lambda r: r["size"])
+        sizes = [row["size"] for row in series]
+        label = f"{fraction:.0%} of word list"
+        time_axis.plot(sizes, [row["median_seconds"] for row in series], marker="o", label=label)
+        memory_axis.plot(sizes, [row["peak_mb"] for row in series], marker="o", label=label)
+    time_axis.set(xlabel="cells", ylabel="median fill seconds", yscale="log", title="Fill time")
+    memory_axis.set(xlabel="cells", ylabel="peak MB", title="Memory")
+    time_axis.legend()
+    figure.tight_layout()
+    figure.savefig(path)
+    return True
+
+def print_rows(rows):
+    print(f"{'layout':<17} {'words':>7} {'filled':>7} {'median s':>9} {'max s':>7} {'placements':>11} {'backtracks':>11} "
+          f"{'peak MB':>8}")
+    for row in rows:
+        print(f"{row['layout']:<17} {row['words']:>7} {row['success_rate']:>7.0%} {row['median_seconds']:>9.2f} "
+              f"{row['max_seconds']:>7.2f} {row['median_placements']:>11.0f} {row['median_backtracks']:>11.0f} "
+              f"{row['peak_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fill time and memory versus grid size and word count")
+    parser.add_argument("--dict", default="spreadthewordlist_caps.dict")
+    parser.add_argument("--complexity", type=int, default=35)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--time-limit", type=float, default=30)
+    parser.add_argument("--fractions", type=float, nargs="+", default=[0.25, 0.5, 1.0])
+    parser.add_argument("--order", choices=["random", "score", "crossing"], default="random")
+    parser.add_argument("--csv", default="fill_scaling.csv")
+    parser.add_argument("--plot", default="fill_scaling.png")
+    args = parser.parse_args()
+
+    rows = run_scaling(build_word_dictionary(args.dict), fractions=args.fractions, complexity=args.complexity,
+                       seeds=args.seeds, time_limit=args.time_limit, order=args.order)
+    print_rows(rows)
+    write_csv(rows, args.csv)
+    print("Wrote", args.csv)
+    if plot_scaling(rows, args.plot):
+        print("Wrote", args.plot)
+    else:
+        print("matplotlib is not installed; plot the CSV instead")
+    for name, metric, value, target, passed in check_targets(rows):
+        print(f"{name} {metric}: {value:.2f} (target {target}) {'PASS' if passed else 'FAIL'}")
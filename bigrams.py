@@ -0,0 +1,103 @@
+# bigrams.py
+
+
+class BigramTable:
+    """
+    Positional letter-pair feasibility for every word length in a word list.
+
+    For each length and position the table keeps, per letter, a bitmask of the
+    letters that follow it there in at least one usable word, so asking whether a
+    letter can sit next to its neighbours in a slot is a dictionary lookup and a
+    shift. A pair that never occurs rules the letter out before any scan of the word
+    list or pattern index. With trigrams, the window centred on the letter is also
+    checked once both neighbours are filled. Checks and rejections are counted.
+    """
+
+    def __init__(self, word_dict, complexity=25, trigrams=False):
+        self.follow = {}
+        self.triples = {} if trigrams else None
+        for length, word_list in word_dict.items():
+            follow = [{} for _ in range(length - 1)]
+            triples = [set() for _ in range(max(0, length - 2))]
+            for word, points in word_list:
+                if points <= complexity:
+                    continue
+                for i in range(length - 1):
+                    follow[i][word[i]] = follow[i].get(word[i], 0) | (1 << ord(word[i + 1]))
+                if trigrams:
+                    for i in range(length - 2):
+                        triples[i].add(word[i:i + 3])
+            self.follow[length] = follow
+            if trigrams:
+                self.triples[length] = triples
+        self.checks = 0
+        self.rejects = 0
+
+    def allows(self, length, pos, first, second):
+        """
+        Checks if some usable word of the length has first at pos and second at pos + 1.
+        """
+        follow = self.follow.get(length)
+        return follow is not None and (follow[pos].get(first, 0) >> ord(second)) & 1 == 1
+
+    def feasible(self, length, pos, before, letter, after):
+        """
+        Checks a letter against its neighbours in a slot, counting the check.
+
+        :param length: Integer, the length of the slot.
+        :param pos: Integer, the position of the letter in the slot.
+        :param before: The letter at pos - 1, or '.' / None if empty or outside the slot.
+        :param letter: The letter at pos.
+        :param after: The letter at pos + 1, or '.' / None if empty or outside the slot.
+        :return: Boolean, False if no usable word can have these letters together.
+        """
+        self.checks += 1
+        has_before = before is not None and before != '.'
+        has_after = after is not None and after != '.'
+        ok = ((not has_before or self.allows(length, pos - 1, before, letter))
+              and (not has_after or self.allows(length, pos, letter, after)))
+        if ok and has_before and has_after and self.triples is not None:
+            ok = before + letter + after in self.triples[length][pos - 1]
+        if not ok:
+            self.rejects += 1
+        return ok
+
+    def stats(self):
+        """
+        Returns the counters: checks made, rejects (full checks avoided) and reject rate.
+        """
+        return {
+            "checks": self.checks,
+            "rejects": self.rejects,
+            "reject_rate": self.rejects / self.checks if self.checks else 0.0,
+        }
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    from bench_fill import LAYOUTS
+    from demo import build_word_dictionary, create_symmetrical_grid2, fill_grid_sam
+    from fill_engine import build_pattern_index, iter_fills
+
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+
+    # fill_grid_sam removes placed words from the dictionary it is given, so each run gets a fresh one.
+    for table in (None, BigramTable(word_dict, 35, trigrams=True)):
+        random.seed(0)
+        start = time.time()
+        fill_grid_sam(create_symmetrical_grid2(4, 4, []), build_word_dictionary('spreadthewordlist_caps.dict'), 35,
+                      bigrams=table)
+        print('fill_grid_sam', 'with' if table else 'without', 'table:', time.time() - start, 'seconds',
+              table.stats() if table else '')
+
+    index = build_pattern_index(word_dict, 35)
+    for table in (None, BigramTable(word_dict, 35, trigrams=True)):
+        stats = {}
+        start = time.time()
+        for seed in range(20):
+            next(iter_fills(create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"]), word_dict, 35, index=index,
+                            rng=random.Random(seed), stats=stats, bigrams=table), None)
+        print('engine', 'with' if table else 'without', 'table:', time.time() - start, 'seconds',
+              stats, table.stats() if table else '')
@@ -0,0 +1,62 @@
+# checkpoint.py
+import hashlib
+import os
+import pickle
+import zlib
+from array import array
+
+
+def index_fingerprint(index):
+    """
+    Hashes the words and scores of a pattern index, so a checkpoint is only resumed
+    against the same word list it was taken with.
+
+    :param index: Pattern index as returned by fill_engine.build_pattern_index.
+    :return: Hex digest string.
+    """
+    digest = hashlib.sha1()
+    for length in sorted(index):
+        entry = index[length]
+        digest.update(f"{length}:{len(entry['words'])}\n".encode())
+        digest.update('\n'.join(entry["words"]).encode())
+        digest.update(array('i', entry["scores"]).tobytes())
+    return digest.hexdigest()
+
+def pack_indices(indices):
+    """
+    Packs a list of candidate indices into bytes.
+    """
+    return array('I', indices).tobytes()
+
+def unpack_indices(data):
+    """
+    Unpacks bytes written by pack_indices into a list of integers.
+    """
+    indices = array('I')
+    indices.frombytes(data)
+    return indices.tolist()
+
+def write_checkpoint(path, state):
+    """
+    Writes a search state to a compressed checkpoint file, replacing any older one atomically.
+
+    :param path: Path of the checkpoint file.
+    :param state: Dictionary of picklable search state.
+    :return: Integer size of the checkpoint in bytes.
+    """
+    data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+def read_checkpoint(path):
+    """
+    Reads a search state written by write_checkpoint.
+
+    :param path: Path of the checkpoint file.
+    :return: Dictionary of search state.
+    """
+    with open(path, "rb") as file:
+        return pickle.loads(zlib.decompress(file.read()))
@@ -2,9 +2,13 @@
 import random
 import os
 import time
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import APIError
 import tkinter as tk
 from tkinter import Canvas, Scrollbar
+from nogood import crossing_key
+from llm_client import get_client, estimate_tokens
+from anagrams import anagram_hint, validate_anagram_clue
 
 
 ## HELPERS
@@ -168,9 +172,13 @@ def get_vertical_word_info(grid, row, col):
 
     return length, letters, down_count
 
-def is_valid_intersection(grid, word, row, col, word_dict, complexity):
+def is_valid_intersection(grid, word, row, col, word_dict, complexity, bigrams=None):
     """
     Checks if placing the word creates valid intersections with perpendicular words.
+
+    :param bigrams: Optional bigrams.BigramTable. A crossing whose last two letters
+                    never occur together at that position is rejected without
+                    scanning the word list.
     """
     out_list = [False] * len(word)
     i = 0
@@ -179,6 +187,9 @@ def is_valid_intersection(grid, word, row, col, word_dict, complexity):
             i += 1
             space_length, letters, _ = get_vertical_word_info(grid, row, col+i-1)
             letters = letters + word[i-1]
+            if bigrams is not None and len(letters) > 1:
+                if not bigrams.feasible(space_length, len(letters) - 1, letters[-2], letters[-1], None):
+                    return False
             word_list = word_dict.get(space_length, [])
             for w, points in word_list:
                 if points>complexity:
@@ -214,10 +225,28 @@ def remove_horizontal_word(grid, row, col):
         end_col += 1
     return removed_word
 
-def fill_grid_sam(grid, word_dict, complexity=25):
+def fill_grid_sam(grid, word_dict, complexity=25, nogood_cache=None, bigrams=None, rng=None, exclude=None):
     """
     Fills the crossword grid with words from the dictionary, starting from the top left.
+
+    :param nogood_cache: Optional nogood.NogoodCache. Slots that found no word are
+                         remembered by the letters in their crossing columns, and the
+                         word scan is skipped when the same configuration comes back.
+                         The word lists change as words are placed and removed, so a
+                         cached dead end is a heuristic rather than a proof.
+    :param bigrams: Optional bigrams.BigramTable built from the same word list, used to
+                    reject impossible crossings before their word-list scan.
+    :param rng: Optional random.Random instance for the word shuffles; with a seeded one
+                and a fresh copy of the same word_dict, a fill is reproduced exactly.
+                Without it the global random module is used.
+    :param exclude: Optional set of words that may not be placed, such as the answers of
+                    recent puzzles from answer_history. They are removed from word_dict
+                    before the fill starts.
     """
+    shuffle = rng.shuffle if rng is not None else random.shuffle
+    if exclude is not None:
+        for length, word_list in word_dict.items():
+            word_dict[length] = [(word, points) for word, points in word_list if word not in exclude]
     row = 0
     col = 0
 
@@ -228,10 +257,15 @@ def fill_grid_sam(grid, word_dict, complexity=25):
             if (space_length > 0):
                 word_placed = False
                 word_list = word_dict.get(space_length, [])
-                random.shuffle(word_list)
+                shuffle(word_list)
+                nogood_key = None
+                if nogood_cache is not None:
+                    nogood_key = crossing_key(grid, row, col, space_length)
+                    if nogood_cache.contains(nogood_key):
+                        word_list = []
                 for word, points in word_list:
                     assert(col + space_length-1 < len(grid[0]))
-                    if points > complexity and is_valid_intersection(grid, word, row, col, word_dict, complexity):
+                    if points > complexity and is_valid_intersection(grid, word, row, col, word_dict, complexity, bigrams):
                         place_word(grid, word, row, col)
                         # print_grid(grid)
                         word_dict[len(word)] = [(w, p) for w, p in word_dict[len(word)] if w != word]
@@ -239,6 +273,8 @@ def fill_grid_sam(grid, word_dict, complexity=25):
                         word_placed = True
                         break
                 if not word_placed:
+                    if nogood_key is not None:
+                        nogood_cache.add(nogood_key)
                     # Remove all words in the same column and go back to start
                     lowest_row = len(grid)
 
@@ -268,6 +304,45 @@ def fill_grid_sam(grid, word_dict, complexity=25):
     else:
         return grid
 
+def get_slots(grid, min_length=2):
+    """
+    Finds every across and down slot (run of non-black cells) in the grid.
+
+    :param grid: 2D list representing the crossword grid.
+    :param min_length: Integer, the shortest run of cells that counts as a slot.
+    :return: List of tuples (direction, row, col, length) with 0-based coordinates.
+    """
+    slots = []
+    rows, cols = len(grid), len(grid[0])
+
+    # Find Across slots
+    for row in range(rows):
+        col = 0
+        while col < cols:
+            if grid[row][col] == '#':
+                col += 1
+                continue
+            start_col = col
+            while col < cols and grid[row][col] != '#':
+                col += 1
+            if col - start_col >= min_length:
+                slots.append(("Across", row, start_col, col - start_col))
+
+    # Find Down slots
+    for col in range(cols):
+        row = 0
+        while row < rows:
+            if grid[row][col] == '#':
+                row += 1
+                continue
+            start_row = row
+            while row < rows and grid[row][col] != '#':
+                row += 1
+            if row - start_row >= min_length:
+                slots.append(("Down", start_row, col, row - start_row))
+
+    return slots
+
 def output_wordlist(grid):
     across_words = []
     down_words = []
@@ -342,10 +417,7 @@ def print_and_store_word_lists(grid):
 
     return numbered_words
 
-def create_clues(word_list, AImodel="gpt-3.5-turbo"):
-    client = OpenAI()  # Replace with your actual API key
-
-    system_prompt = """
+CLUE_SYSTEM_PROMPT = """
     You are a crossword clue creator, skilled in crossword clues with a creative flair.
     Your clues make use of:
     Double definitions (The clue is a second definition of the word.
@@ -358,22 +430,156 @@ def create_clues(word_list, AImodel="gpt-3.5-turbo"):
     You will randomly select one of these 5 options and create a clue. The clue should be one phrase. Respond with only the text of this clue.
     """
 
-    clues = {}
+CLUE_BATCH_INSTRUCTIONS = """
+    You will be given several words, one per line. Create one clue for each word and respond with
+    one line per word in the form WORD: clue
+    """
+
+def request_completion(client, messages, AImodel, max_tokens, telemetry=None, max_retries=2,
+                       rate_limiter=None, word=None):
+    """
+    Sends one chat completion request, retrying API errors with backoff.
 
-    for category in ["Across", "Down"]:
-        clues[category] = {}
-        for num, (row, col, word) in word_list[category].items():
-            user_prompt = "Create a clue for the word " + word + ":"
+    :return: String, the text of the first choice.
+    """
+    estimated_tokens = estimate_tokens(messages, max_tokens)
+    st = time.time()
+    attempt = 0
+    waited = 0.0
+    while True:
+        if rate_limiter is not None:
+            waited += rate_limiter.acquire(estimated_tokens)
+        try:
             response = client.chat.completions.create(
                 model= AImodel,
-                max_tokens=60,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
+                max_tokens=max_tokens,
+                messages=messages
             )
-            clue = response.choices[0].message.content
-            clues[category][num] = (word, clue)
+            break
+        except APIError:
+            if attempt >= max_retries:
+                if telemetry is not None:
+                    telemetry.record(AImodel, time.time() - st, attempt, word=word, ok=False, wait=waited)
+                raise
+            attempt += 1
+            time.sleep(min(2 ** attempt, 30))
+    usage = response.usage
+    if rate_limiter is not None and usage:
+        rate_limiter.settle(estimated_tokens, usage.total_tokens)
+    if telemetry is not None:
+        telemetry.record(AImodel, time.time() - st, attempt,
+                         usage.prompt_tokens if usage else 0,
+                         usage.completion_tokens if usage else 0, word=word, wait=waited)
+    return response.choices[0].message.content
+
+def create_clue(client, word, AImodel="gpt-3.5-turbo", anagram_index=None, **request_options):
+    """
+    Creates the clue for a single word.
+
+    With an anagram index, the prompt lists the word's verified dictionary anagrams
+    (or says it has none), and an anagram clue whose anagram is not a dictionary word
+    is replaced by one request for a clue of another kind.
+    """
+    user_prompt = "Create a clue for the word " + word + ":"
+    if anagram_index is not None:
+        user_prompt += anagram_hint(anagram_index, word)
+    messages = [
+        {"role": "system", "content": CLUE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+    clue = request_completion(client, messages, AImodel, 60, word=word, **request_options)
+    if anagram_index is not None and not validate_anagram_clue(anagram_index, word, clue):
+        messages[1]["content"] = "Create a clue for the word " + word + ": Do not write an anagram clue."
+        clue = request_completion(client, messages, AImodel, 60, word=word, **request_options)
+    return clue
+
+def create_clue_batch(client, words, AImodel="gpt-3.5-turbo", anagram_index=None, **request_options):
+    """
+    Creates clues for several words with one request.
+    Words the model skips or garbles, or whose anagram clue fails validation against
+    the optional anagram index, are clued again one at a time.
+
+    :return: Dictionary {word: clue}.
+    """
+    user_prompt = "\n".join(words)
+    messages = [
+        {"role": "system", "content": CLUE_SYSTEM_PROMPT + CLUE_BATCH_INSTRUCTIONS},
+        {"role": "user", "content": user_prompt}
+    ]
+    content = request_completion(client, messages, AImodel, 60 * len(words), word=",".join(words),
+                                 **request_options)
+    clues = {}
+    for line in content.splitlines():
+        answer, _, clue = line.partition(":")
+        answer = answer.strip().strip("*").upper()
+        if answer in words and clue.strip():
+            if anagram_index is None or validate_anagram_clue(anagram_index, answer, clue):
+                clues[answer] = clue.strip()
+    for word in words:
+        if word not in clues:
+            clues[word] = create_clue(client, word, AImodel, anagram_index, **request_options)
+    return clues
+
+def create_clues(word_list, AImodel="gpt-3.5-turbo", telemetry=None, max_retries=2, client=None,
+                 rate_limiter=None, concurrency=1, batch_size=1, anagram_index=None, on_clue=None):
+    """
+    Creates a clue for every word in the numbered word list.
+
+    :param word_list: Numbered words as returned by print_and_store_word_lists.
+    :param AImodel: String, the chat model to use.
+    :param telemetry: Optional telemetry.ClueTelemetry that records latency, retries,
+                      token usage and cost for every request.
+    :param max_retries: Integer, how many times a failed request is retried with backoff
+                        (the shared client does not retry on its own).
+    :param client: Optional OpenAI client; defaults to the shared keep-alive client of this process.
+    :param rate_limiter: Optional llm_client.FileRateLimiter shared with other processes.
+    :param concurrency: Integer, the number of requests in flight at once.
+    :param batch_size: Integer, the number of words clued per request.
+    :param anagram_index: Optional index from anagrams.build_anagram_index used to offer
+                          verified anagrams in the prompt and to check anagram clues.
+    :param on_clue: Optional callable (category, num, word, clue) called as soon as each
+                    clue arrives, possibly from a worker thread.
+    :return: Dictionary {"Across": {num: (word, clue)}, "Down": {...}}.
+    """
+    if client is None:
+        client = get_client()  # Reads OPENAI_API_KEY from the environment
+    request_options = {"telemetry": telemetry, "max_retries": max_retries, "rate_limiter": rate_limiter}
+
+    entries = [(category, num, word) for category in ["Across", "Down"]
+               for num, (row, col, word) in word_list[category].items()]
+    if batch_size > 1:
+        words = list(dict.fromkeys(word for _, _, word in entries))
+        jobs = [words[i:i + batch_size] for i in range(0, len(words), batch_size)]
+        run = lambda batch: create_clue_batch(client, batch, AImodel, anagram_index, **request_options)
+    else:
+        jobs = [[word] for _, _, word in entries]
+        run = lambda batch: {batch[0]: create_clue(client, batch[0], AImodel, anagram_index, **request_options)}
+
+    if on_clue is not None:
+        run_job = run
+        def run(batch):
+            result = run_job(batch)
+            for category, num, word in entries:
+                if word in result:
+                    on_clue(category, num, word, result[word])
+            return result
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(run, jobs))
+    else:
+        results = [run(job) for job in jobs]
+
+    clues = {"Across": {}, "Down": {}}
+    if batch_size > 1:
+        word_clues = {}
+        for result in results:
+            word_clues.update(result)
+        for category, num, word in entries:
+            clues[category][num] = (word, word_clues[word])
+    else:
+        for (category, num, word), result in zip(entries, results):
+            clues[category][num] = (word, result[word])
 
     return clues
 
@@ -390,6 +596,20 @@ def print_clues(crossword_clues):
     for num, (word, clue) in crossword_clues["Down"].items():
         print(f"  {num}. {clue} ({word})")
 
+def gui_cell_size(grid, max_pixels=840):
+    """
+    Picks a cell size in pixels so that grids larger than 21x21 still fit on screen.
+    """
+    return max(20, min(40, max_pixels // max(len(grid), len(grid[0]))))
+
+def cell_numbers(numbered_words):
+    """
+    Maps each numbered cell to its clue number, with 0-based (row, col) keys.
+    """
+    return {(row - 1, col - 1): number
+            for direction in ("Across", "Down")
+            for number, (row, col, _) in numbered_words[direction].items()}
+
 def create_crossword_gui(grid, numbered_words, crossword_clues):
     root = tk.Tk()
     root.title("Crossword Puzzle")
@@ -399,17 +619,17 @@ def create_crossword_gui(grid, numbered_words, crossword_clues):
     grid_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
     # Draw grid
+    size = gui_cell_size(grid)
+    numbers = cell_numbers(numbered_words)
     for r, row in enumerate(grid):
         for c, cell in enumerate(row):
-            frame = tk.Frame(grid_frame, width=40, height=40, borderwidth=1, relief="solid", bg='white')
+            frame = tk.Frame(grid_frame, width=size, height=size, borderwidth=1, relief="solid", bg='white')
             frame.grid_propagate(False)  # Prevents the frame from resizing
             frame.grid(row=r, column=c, sticky="nsew")
             if cell == '#':
                 frame.config(bg='black')
             else:
-                number_across = next((number for number, (row, col, word) in numbered_words["Across"].items() if row == r + 1 and col == c + 1), None)
-                number_down = next((number for number, (row, col, word) in numbered_words["Down"].items() if row == r + 1 and col == c + 1), None)
-                number = number_across or number_down
+                number = numbers.get((r, c))
                 if number:
                     number_lbl = tk.Label(frame, text=str(number), bg='white', fg='black', font=('Arial', 10), anchor='nw')
                     number_lbl.pack(side=tk.TOP, anchor='nw', padx=0, pady=0)
@@ -445,19 +665,19 @@ def create_crossword_gui2(grid, numbered_words, crossword_clues):
     grid_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
     # Draw grid
+    size = gui_cell_size(grid)
+    numbers = cell_numbers(numbered_words)
     for r, row in enumerate(grid):
         for c, cell in enumerate(row):
-            frame = tk.Frame(grid_frame, width=40, height=40, borderwidth=1, relief="solid", bg='white')
+            frame = tk.Frame(grid_frame, width=size, height=size, borderwidth=1, relief="solid", bg='white')
             frame.grid_propagate(False)  # Prevents the frame from resizing
             frame.grid(row=r, column=c, sticky="nsew")
-            grid_frame.grid_columnconfigure(c, minsize=40)
-            grid_frame.grid_rowconfigure(r, minsize=40)
+            grid_frame.grid_columnconfigure(c, minsize=size)
+            grid_frame.grid_rowconfigure(r, minsize=size)
             if cell == '#':
                 frame.config(bg='black')
             else:
-                number_across = next((number for number, (row, col, word) in numbered_words["Across"].items() if row == r + 1 and col == c + 1), None)
-                number_down = next((number for number, (row, col, word) in numbered_words["Down"].items() if row == r + 1 and col == c + 1), None)
-                number = number_across or number_down
+                number = numbers.get((r, c))
                 if number:
                     number_lbl = tk.Label(frame, text=str(number), bg='white', fg='black', font=('Arial', 10), anchor='nw')
                     number_lbl.pack(side=tk.TOP, anchor='nw', padx=0, pady=0)
@@ -568,13 +788,52 @@ def wednesday_demo(AImodel="gpt-3.5-turbo"):
     print_answers(final_wordlist)
     return elapsed_time
 
+def sunday_demo(AImodel="gpt-3.5-turbo"):
+    # fill_grid_sam's column-wipe backtracking does not finish at this size, so the
+    # Sunday grid goes through the constrained engine (imported here, it imports demo).
+    from fill_engine import fill_grid_constrained
+
+    dict_file_path = 'spreadthewordlist_caps.dict'
+    demo4 = [(0, 3), (0, 7), (0, 11), (0, 15), (0, 16), (1, 7), (1, 15), (2, 15),
+             (3, 4), (3, 5), (3, 9), (3, 10), (3, 14), (4, 3), (4, 10), (4, 11), (4, 16),
+             (5, 3), (5, 8), (5, 13), (6, 6), (6, 7), (6, 13), (7, 6), (7, 7), (7, 12),
+             (7, 17), (8, 9), (8, 10), (8, 14), (9, 3), (9, 4), (9, 8), (9, 14), (9, 18),
+             (9, 19), (9, 20), (10, 0), (10, 4), (10, 5)]
+    crossword_grid = create_symmetrical_grid2(21, 21, demo4)
+    word_dict = build_word_dictionary(dict_file_path)
+    print_grid(crossword_grid)
+    final_grid, filled = fill_grid_constrained(crossword_grid, word_dict, 35, time_limit=60)
+    if not filled:
+        return None
+    print_grid(final_grid)
+    final_wordlist = print_and_store_word_lists(final_grid)
+    print()
+    print("Generating clues...")
+    print()
+    st = time.time()
+    crossword_clues = create_clues(final_wordlist, AImodel, concurrency=8)
+    et = time.time()
+    elapsed_time = et - st
+    print('Clue generation time:', elapsed_time, 'seconds')
+    create_crossword_gui2(final_grid, final_wordlist, crossword_clues)
+    print_answers(final_wordlist)
+    return elapsed_time
+
 def mini_demo():
+    # Open minis go through the word-square solver, which picks the best-scoring
+    # fill of the whole solution set (imported here, it imports demo).
+    from minis import best_minis
+
     demo3 = [(0, 3)]
     dict_file_path = 'spreadthewordlist_caps.dict'
     crossword_grid = create_symmetrical_grid2(5,7,demo3)
     word_dict = build_word_dictionary(dict_file_path)
     print_grid(crossword_grid)
-    final_grid = fill_grid_sam(crossword_grid, word_dict, 35)
+    fills = best_minis(crossword_grid, word_dict, 1, 35, rng=random.Random())
+    if not fills:
+        print("NOT FILLED")
+        return None
+    final_grid = fills[0][1]
     final_wordlist = print_and_store_word_lists(final_grid)
     print()
     print("Generating clues...")
@@ -589,12 +848,18 @@ def mini_demo():
     return elapsed_time
 
 def mini_demo2():
+    from minis import best_minis
+
     demo3 = []
     dict_file_path = 'spreadthewordlist_caps.dict'
     crossword_grid = create_symmetrical_grid2(4,4,demo3)
     word_dict = build_word_dictionary(dict_file_path)
     print_grid(crossword_grid)
-    final_grid = fill_grid_sam(crossword_grid, word_dict, 35)
+    fills = best_minis(crossword_grid, word_dict, 1, 35, rng=random.Random())
+    if not fills:
+        print("NOT FILLED")
+        return None
+    final_grid = fills[0][1]
     final_wordlist = print_and_store_word_lists(final_grid)
     print()
     print("Generating clues...")
@@ -609,12 +874,18 @@ def mini_demo2():
     return elapsed_time
 
 def mini_demo3():
+    from minis import best_minis
+
     demo3 = []
     dict_file_path = 'spreadthewordlist_caps.dict'
     crossword_grid = create_symmetrical_grid2(5,5,demo3)
     word_dict = build_word_dictionary(dict_file_path)
     print_grid(crossword_grid)
-    final_grid = fill_grid_sam(crossword_grid, word_dict, 35)
+    fills = best_minis(crossword_grid, word_dict, 1, 35, rng=random.Random())
+    if not fills:
+        print("NOT FILLED")
+        return None
+    final_grid = fills[0][1]
     final_wordlist = print_and_store_word_lists(final_grid)
     print()
     print("Generating clues...")
@@ -629,12 +900,18 @@ def mini_demo3():
     return elapsed_time
     
 def mini_demo2_gpt4():
+    from minis import best_minis
+
     demo3 = []
     dict_file_path = 'spreadthewordlist_caps.dict'
     crossword_grid = create_symmetrical_grid2(4,4,demo3)
     word_dict = build_word_dictionary(dict_file_path)
     print_grid(crossword_grid)
-    final_grid = fill_grid_sam(crossword_grid, word_dict, 35)
+    fills = best_minis(crossword_grid, word_dict, 1, 35, rng=random.Random())
+    if not fills:
+        print("NOT FILLED")
+        return None
+    final_grid = fills[0][1]
     final_wordlist = print_and_store_word_lists(final_grid)
     print()
     print("Generating clues...")
@@ -655,9 +932,11 @@ if __name__ == '__main__':
     # wednesday_demo()
     # monday_demo("gpt-4")
     # wednesday_demo("gpt-4")
+    # sunday_demo()
     # mini_demo2()
     # mini_demo()
     # mini_demo2_gpt4()
+    pass
 
     
 
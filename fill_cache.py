@@ -0,0 +1,213 @@
+# fill_cache.py
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+
+from checkpoint import index_fingerprint
+from fill_engine import build_pattern_index, iter_fills
+
+
+## LAYOUTS
+
+def layout_rows(grid):
+    """
+    Reduces a grid to its black-square layout, '#' for black and '.' for every other cell.
+
+    :return: List of row strings.
+    """
+    return [''.join('#' if cell == '#' else '.' for cell in row) for row in grid]
+
+def transpose(rows):
+    return [''.join(column) for column in zip(*rows)]
+
+def layout_variants(rows):
+    """
+    Yields the 8 rotations and reflections of a layout (some may coincide).
+    """
+    for base in (list(rows), [row[::-1] for row in rows]):
+        for _ in range(4):
+            yield base
+            base = [column[::-1] for column in transpose(base)]
+
+def layout_text(rows):
+    return f"{len(rows)}x{len(rows[0]) if rows else 0}:" + '/'.join(rows)
+
+def layout_key(grid):
+    """
+    Computes the cache key of a grid's layout.
+
+    The layout hash folds all rotations and reflections, so the mirror images of a
+    standard pattern share one key. Only the identity and transposition map a fill to
+    a fill, though (the others read entries backwards), so each layout also has a
+    variant: the smaller of itself and its transpose. Fills are stored in the variant's
+    orientation and served to layouts of the same variant, transposed when needed.
+
+    :param grid: 2D list or list of row strings; letters are ignored.
+    :return: Tuple (layout hash, variant hash, transposed) where transposed is True if
+             the grid is the transpose of its variant.
+    """
+    rows = layout_rows(grid)
+    canonical = min(layout_text(variant) for variant in layout_variants(rows))
+    text = layout_text(rows)
+    flipped = layout_text(transpose(rows))
+    variant = min(text, flipped)
+    return (hashlib.sha1(canonical.encode()).hexdigest(), hashlib.sha1(variant.encode()).hexdigest(),
+            text != variant)
+
+## CACHE
+
+class FillCache:
+    """
+    Persistent store of successful fills in SQLite, keyed by layout, word list and
+    complexity. Each key holds several fills; take() hands out one that has not been
+    served before and marks it served, and backfill() tops up the unserved supply, so
+    repeat requests for a standard layout can be answered without a search.
+
+    The word list is identified by the fingerprint of its pattern index (the words and
+    scores above the complexity), so an edited word list never serves stale fills.
+    Only empty layouts are cached; grids with theme letters are always filled fresh.
+    """
+
+    def __init__(self, path="fills.sqlite"):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS fills ("
+                " layout TEXT NOT NULL, variant TEXT NOT NULL, dictionary TEXT NOT NULL,"
+                " complexity INTEGER NOT NULL, fill TEXT NOT NULL, seed INTEGER,"
+                " served INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL,"
+                " PRIMARY KEY (layout, variant, dictionary, complexity, fill))")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS unserved ON fills (layout, variant, dictionary, complexity, served)")
+
+    def close(self):
+        self.connection.close()
+
+    def put(self, fill, dictionary, complexity, seed=None, served=False):
+        """
+        Stores a filled grid; a fill that is already cached is left as it is.
+
+        :param fill: 2D list or list of row strings of a complete fill.
+        :param dictionary: String, the word list fingerprint (see checkpoint.index_fingerprint).
+        :param complexity: Integer, the threshold the fill was made with.
+        :param seed: Optional integer seed that reproduces the fill; it is dropped when the fill
+                     is stored transposed, as it would not reproduce the stored orientation.
+        :param served: Boolean, True if the fill has already been handed out.
+        :return: Boolean, True if the fill was new.
+        """
+        layout, variant, transposed = layout_key(fill)
+        rows = [''.join(row) for row in fill]
+        if transposed:
+            rows = transpose(rows)
+            seed = None
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO fills VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (layout, variant, dictionary, complexity, '\n'.join(rows), seed, int(served), time.time()))
+            return cursor.rowcount == 1
+
+    def take(self, grid, dictionary, complexity):
+        """
+        Hands out a cached fill of the grid's layout that has not been served before.
+
+        A seed reproduces the fill only in the orientation it was made in, so a fill served
+        transposed comes back without one.
+
+        :param grid: 2D list or list of row strings; grids with letters are never served from the cache.
+        :return: Tuple (fill as a list of row strings, seed or None), or None on a miss.
+        """
+        if any(cell not in '#.' for row in grid for cell in row):
+            return None
+        layout, variant, transposed = layout_key(grid)
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT rowid, fill, seed FROM fills WHERE layout = ? AND variant = ? AND dictionary = ?"
+                " AND complexity = ? AND served = 0 ORDER BY created LIMIT 1",
+                (layout, variant, dictionary, complexity)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE fills SET served = 1 WHERE rowid = ?", (row[0],))
+            self.hits += 1
+        rows = row[1].split('\n')
+        if transposed:
+            return transpose(rows), None
+        return rows, row[2]
+
+    def count(self, grid, dictionary, complexity, served=None):
+        """
+        Counts the cached fills of a grid's layout, only served or unserved ones if served is given.
+        """
+        layout, variant, _ = layout_key(grid)
+        query = "SELECT COUNT(*) FROM fills WHERE layout = ? AND variant = ? AND dictionary = ? AND complexity = ?"
+        params = [layout, variant, dictionary, complexity]
+        if served is not None:
+            query += " AND served = ?"
+            params.append(int(served))
+        with self.lock:
+            return self.connection.execute(query, params).fetchone()[0]
+
+    def backfill(self, grid, word_dict, complexity=25, index=None, target=5, attempts=None, time_limit=30.0,
+                 rng=None):
+        """
+        Fills the layout with fresh seeds until the cache holds target unserved fills.
+
+        :param grid: 2D list or list of row strings; letters are ignored.
+        :param target: Integer, the unserved fills wanted for the layout.
+        :param attempts: Optional cap on fill attempts, 2 * target by default.
+        :param time_limit: Float, seconds allowed per attempt.
+        :param rng: Optional random.Random that draws the seeds.
+        :return: Integer, the number of fills added.
+        """
+        if index is None:
+            index = build_pattern_index(word_dict, complexity)
+        dictionary = index_fingerprint(index)
+        rng = rng or random.Random()
+        layout = [list(row) for row in layout_rows(grid)]
+        added = 0
+        for _ in range(attempts if attempts is not None else 2 * target):
+            if self.count(layout, dictionary, complexity, served=False) >= target:
+                break
+            seed = rng.randrange(2 ** 32)
+            fill = next(iter_fills(layout, word_dict, complexity, index=index, rng=random.Random(seed),
+                                   time_limit=time_limit), None)
+            if fill is not None and self.put(fill, dictionary, complexity, seed):
+                added += 1
+        return added
+
+    def stats(self):
+        with self.lock:
+            fills, unserved = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(served = 0), 0) FROM fills").fetchone()
+        return {"fills": fills, "unserved": unserved, "hits": self.hits, "misses": self.misses}
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+
+    from bench_fill import LAYOUTS
+    from demo import build_word_dictionary, create_symmetrical_grid2
+
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    index = build_pattern_index(word_dict, 35)
+    dictionary = index_fingerprint(index)
+    grid = create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"])
+
+    cache = FillCache(os.path.join(tempfile.mkdtemp(), "fills.sqlite"))
+    start = time.time()
+    print("Backfilled", cache.backfill(grid, word_dict, 35, index, target=4, rng=random.Random(0)), "fills in",
+          round(time.time() - start, 2), "seconds")
+    # The transposed layout shares the cache entry.
+    for request in (grid, [list(row) for row in transpose(grid)], grid, grid, grid):
+        start = time.perf_counter()
+        served = cache.take(request, dictionary, 35)
+        print("hit" if served else "miss", f"{(time.perf_counter() - start) * 1000:.2f} ms",
+              served[0][0] if served else '')
+    print(cache.stats())
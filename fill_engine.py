@@ -0,0 +1,625 @@
+# fill_engine.py
+import math
+import random
+import time
+
+from demo import get_slots
+from checkpoint import index_fingerprint, pack_indices, read_checkpoint, unpack_indices, write_checkpoint
+
+
+## INDEX
+
+def build_pattern_index(word_dict, complexity=25):
+    """
+    Builds a letter-position index over the word list for fast pattern lookups.
+
+    Words of each length are sorted by score (best first) and every (position, letter)
+    pair maps to a bitmask of the words that have that letter there, so the words
+    matching a pattern like 'C.T' are the AND of a couple of integers. The number of
+    words behind each mask is kept too: it is how well a letter at that position
+    supports a crossing slot of that length (see order='crossing' in iter_fills).
+
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, only words scoring above this are indexed.
+    :return: Dictionary where keys are word lengths and values are dictionaries with
+             'words', 'scores', 'all' (mask of every word), 'masks' ((pos, letter) -> mask)
+             and 'counts' ((pos, letter) -> number of words).
+    """
+    index = {}
+    for length, word_list in word_dict.items():
+        best = {}
+        for word, points in word_list:
+            if points > complexity and points > best.get(word, -1):
+                best[word] = points
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+
+        masks = {}
+        counts = {}
+        for i, (word, _) in enumerate(ranked):
+            bit = 1 << i
+            for pos, letter in enumerate(word):
+                masks[(pos, letter)] = masks.get((pos, letter), 0) | bit
+                counts[(pos, letter)] = counts.get((pos, letter), 0) + 1
+
+        index[length] = {
+            "words": [word for word, _ in ranked],
+            "scores": [points for _, points in ranked],
+            "all": (1 << len(ranked)) - 1,
+            "masks": masks,
+            "counts": counts,
+        }
+    return index
+
+def pattern_mask(index, pattern):
+    """
+    Finds the words matching a pattern, where '.' stands for an empty cell.
+
+    :param index: Pattern index as returned by build_pattern_index.
+    :param pattern: String, the current letters of a slot.
+    :return: Integer bitmask of matching word positions in index[len(pattern)]['words'].
+    """
+    entry = index.get(len(pattern))
+    if entry is None:
+        return 0
+    mask = entry["all"]
+    masks = entry["masks"]
+    for pos, letter in enumerate(pattern):
+        if letter != '.':
+            mask &= masks.get((pos, letter), 0)
+            if not mask:
+                break
+    return mask
+
+def mask_to_indices(mask):
+    """
+    Lists the set bit positions of a mask in increasing order (best-scoring words first).
+
+    :param mask: Integer bitmask.
+    :return: List of integers.
+    """
+    bits = bin(mask)[:1:-1]
+    indices = []
+    i = bits.find('1')
+    while i != -1:
+        indices.append(i)
+        i = bits.find('1', i + 1)
+    return indices
+
+def best_score(index, length, mask):
+    """
+    Returns the highest score among the words in a mask, or None if the mask is empty.
+    Words are indexed best first, so this is the score of the lowest set bit.
+    """
+    if not mask:
+        return None
+    return index[length]["scores"][(mask & -mask).bit_length() - 1]
+
+def crossing_support(index, slot_cells, crossings):
+    """
+    Builds, for every slot of a grid, the support a letter gives the slots crossing it:
+    per crossed position, log2 of the number of words of the crossing slot's length
+    that have the letter at the shared cell. A word's crossing support is the sum over
+    its positions, so words whose letters leave their crossings the most candidates
+    rank first, and a J or Q at a crossing ranks a word far down.
+
+    :param index: Pattern index as returned by build_pattern_index.
+    :param slot_cells: List of the cells of each slot, as from build_slot_map.
+    :param crossings: List of the crossing slots of each slot, as from build_slot_map.
+    :return: List where entry i is a list of (position, {letter: support}) pairs for slot i.
+    """
+    support = []
+    for slot, cells in enumerate(slot_cells):
+        positions = []
+        for other in crossings[slot]:
+            other_cells = slot_cells[other]
+            shared = set(cells).intersection(other_cells).pop()
+            pos = other_cells.index(shared)
+            counts = index.get(len(other_cells), {"counts": {}})["counts"]
+            letters = {letter: math.log2(count) for (p, letter), count in counts.items() if p == pos}
+            positions.append((cells.index(shared), letters))
+        support.append(positions)
+    return support
+
+## SLOTS
+
+def build_slot_map(grid):
+    """
+    Precomputes the slots of the grid and how they cross each other.
+
+    :param grid: 2D list representing the crossword grid.
+    :return: Tuple (slots, slot_cells, crossings) where slots is the list from get_slots,
+             slot_cells[i] is the list of (row, col) cells of slot i and crossings[i] is
+             the list of slot indices sharing a cell with slot i.
+    """
+    slots = get_slots(grid)
+    slot_cells = []
+    cell_slots = {}
+    for i, (direction, row, col, length) in enumerate(slots):
+        if direction == "Across":
+            cells = [(row, col + k) for k in range(length)]
+        else:
+            cells = [(row + k, col) for k in range(length)]
+        slot_cells.append(cells)
+        for cell in cells:
+            cell_slots.setdefault(cell, []).append(i)
+
+    crossings = []
+    for i, cells in enumerate(slot_cells):
+        crossing = []
+        for cell in cells:
+            crossing.extend(j for j in cell_slots[cell] if j != i)
+        crossings.append(crossing)
+    return slots, slot_cells, crossings
+
+def read_slot(grid, cells):
+    """
+    Reads the current letters of a slot, with '.' for empty cells.
+    """
+    return ''.join(grid[r][c] for r, c in cells)
+
+## SEARCH
+
+def iter_fills(grid, word_dict, complexity=25, index=None, rng=None, order="random",
+               time_limit=None, stats=None, objective=None, floor=None, nogoods=None,
+               checkpoint_path=None, checkpoint_interval=60.0, resume=None, stop=None,
+               wants_work=None, donate=None, bigrams=None, on_event=None, exclude=None):
+    """
+    Yields every fill of the grid that keeps its existing letters, one at a time.
+
+    Slots that already hold letters (theme entries, the untouched part of a puzzle)
+    are fixed constraints: their letters narrow the candidate masks of the crossing
+    slots before any search starts, and complete entries count as used words. The
+    search always extends the open slot with the fewest candidates and rejects a word
+    as soon as one of its crossings is left without candidates.
+
+    With an objective ('sum' or 'min' of word scores) and a floor callback, every
+    placement is bounded by the best score still reachable, taking each slot's
+    best-scoring candidate, and branches that cannot beat floor() are cut.
+
+    With a nogood.NogoodCache, every decision point whose whole subtree failed is
+    remembered by a hash of the patterns of the slots still open at that point and of
+    the used words that still match one of them (the only used words that can change
+    what the subtree finds), and the same configuration is abandoned at once if a
+    different order of earlier choices leads back to it. Subtrees that yielded fills
+    or were cut by the score bound are not recorded. The excluded words are part of
+    the key too, so one cache can serve searches with different exclusions.
+
+    With a checkpoint_path, the grid, open slots, used words, decision stack (slot,
+    candidate order and cursor per frame), RNG state and counters are written every
+    checkpoint_interval seconds and when the time limit runs out; resume_fill picks
+    the search up from that file exactly where it stopped. The score floor, the
+    nogood cache and the excluded words are not part of a checkpoint.
+
+    stop, wants_work and donate let several searches share one tree (see
+    parallel_fill). They are polled every few hundred steps: once stop is set the
+    search returns, and while wants_work() is true the untried candidates of the
+    shallowest decision that still has some (the later half of them) are handed to
+    donate as grids with that word written in, so the receiver explores a subtree
+    this search will not. With on_event, stop is checked every step instead, so an
+    event handler that sets it ends the search where a time limit would have.
+
+    :param grid: 2D list representing the crossword grid; it is not modified.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, words must score above this to be used.
+    :param index: Optional pattern index from build_pattern_index, reused across calls.
+    :param rng: Optional random.Random instance used to shuffle candidates.
+    :param order: 'random' to shuffle candidates, 'score' to try the best-scoring words first,
+                  'crossing' to try the words that leave their crossings the most candidates first.
+    :param time_limit: Optional number of seconds after which the search stops.
+    :param stats: Optional dictionary that receives 'placements', 'backtracks' and 'pruned' counters.
+    :param objective: Optional 'sum' or 'min', how word scores combine into a fill score.
+    :param floor: Optional callable returning the score a fill must beat, or None.
+    :param nogoods: Optional nogood.NogoodCache shared across calls on the same grid layout.
+    :param checkpoint_path: Optional path of a checkpoint file to write periodically.
+    :param checkpoint_interval: Float, seconds between checkpoints.
+    :param resume: Optional state from a checkpoint file; see resume_fill.
+    :param stop: Optional threading or multiprocessing Event that cancels the search.
+    :param wants_work: Optional callable returning True when another search is idle.
+    :param donate: Optional callable receiving a list of subproblem grids, used with wants_work.
+    :param bigrams: Optional bigrams.BigramTable; a crossing letter that cannot sit next to
+                    its neighbours rejects the word before the crossing's pattern mask is built.
+    :param on_event: Optional callable (kind, slot, word, changes) called on every 'place'
+                     and 'undo' of a word and every 'backtrack' out of an exhausted slot;
+                     changes lists the ((row, col), letter) cell updates, '.' when cleared.
+    :param exclude: Optional iterable of words that may not be placed, such as the set of answers
+                    of recent puzzles from answer_history. The words are looked up in the index
+                    once, up front, and cleared from every pattern mask, so excluding costs
+                    nothing per candidate.
+    :return: Generator of filled grids (2D lists).
+    """
+    if index is None:
+        index = build_pattern_index(word_dict, complexity)
+    rng = rng or random.Random()
+    if stats is None:
+        stats = {}
+    stats.setdefault("placements", 0)
+    stats.setdefault("backtracks", 0)
+    stats.setdefault("pruned", 0)
+
+    work = [list(row) for row in grid]
+    slots, slot_cells, crossings = build_slot_map(work)
+    slot_words = [index.get(len(cells), {"words": []})["words"] for cells in slot_cells]
+    mask_cache = {}
+
+    # Words that may not be placed, as a mask of their positions per length.
+    excluded = {}
+    for word in exclude or ():
+        if len(word) in index:
+            excluded[len(word)] = excluded.get(len(word), 0) | pattern_mask(index, word)
+
+    # Position of the shared cell within each crossing slot, for the bigram check.
+    cross_pos = {}
+    if bigrams is not None:
+        for slot, cells in enumerate(slot_cells):
+            for other in crossings[slot]:
+                shared = set(cells).intersection(slot_cells[other]).pop()
+                cross_pos[slot, other] = slot_cells[other].index(shared)
+
+    # Crossing support of every candidate, computed once per slot and word.
+    if order == "crossing":
+        support = crossing_support(index, slot_cells, crossings)
+        support_cache = [{} for _ in slot_cells]
+
+    def word_support(slot, i):
+        value = support_cache[slot].get(i)
+        if value is None:
+            word = slot_words[slot][i]
+            value = sum(letters.get(word[pos], -1.0) for pos, letters in support[slot])
+            support_cache[slot][i] = value
+        return value
+
+    def slot_mask(slot):
+        pattern = read_slot(work, slot_cells[slot])
+        mask = mask_cache.get(pattern)
+        if mask is None:
+            if len(mask_cache) > 200000:
+                mask_cache.clear()
+            mask = pattern_mask(index, pattern)
+            if excluded:
+                mask &= ~excluded.get(len(pattern), 0)
+            mask_cache[pattern] = mask
+        return mask
+
+    open_slots = set()
+    used = set()
+    for slot, cells in enumerate(slot_cells):
+        pattern = read_slot(work, cells)
+        if '.' in pattern:
+            open_slots.add(slot)
+        else:
+            used.add(pattern)
+
+    # Prune around the fixed letters up front: a slot with no candidates means no fill.
+    if resume is None and any(not slot_mask(slot) for slot in open_slots):
+        return
+
+    def upper_bound():
+        """Best fill score still reachable; fixed entries missing from the index count as 0."""
+        bounds = []
+        for slot, cells in enumerate(slot_cells):
+            score = best_score(index, len(cells), slot_mask(slot))
+            if score is not None:
+                bounds.append(score)
+        if objective == "min":
+            return min(bounds, default=0)
+        return sum(bounds)
+
+    def choose_slot():
+        # Ties go to the longest slot, then the lowest slot number, never to set
+        # iteration order, so a search resumed from a checkpoint (which rebuilds the
+        # set) makes the same choices as one that ran straight through.
+        best_slot, best_mask, best_key = None, 0, None
+        for slot in open_slots:
+            mask = slot_mask(slot)
+            count = mask.bit_count()
+            if count == 0:
+                return slot, 0
+            key = (count, -len(slot_cells[slot]), slot)
+            if best_key is None or key < best_key:
+                best_slot, best_mask, best_key = slot, mask, key
+        return best_slot, best_mask
+
+    def place(slot, word):
+        """
+        Writes a word into a slot if every crossing keeps at least one candidate.
+        Crossing slots completed by the word must be unused words themselves.
+
+        :return: Tuple (cells written, [(slot, word)] completed crossings), or None.
+        """
+        written = []
+        for (r, c), letter in zip(slot_cells[slot], word):
+            if work[r][c] == '.':
+                work[r][c] = letter
+                written.append((r, c))
+        completed = []
+        for other in crossings[slot]:
+            if other not in open_slots or other == slot:
+                continue
+            if bigrams is not None:
+                cells = slot_cells[other]
+                pos = cross_pos[slot, other]
+                r, c = cells[pos]
+                before = work[cells[pos - 1][0]][cells[pos - 1][1]] if pos > 0 else None
+                after = work[cells[pos + 1][0]][cells[pos + 1][1]] if pos + 1 < len(cells) else None
+                if not bigrams.feasible(len(cells), pos, before, work[r][c], after):
+                    break
+            if not slot_mask(other):
+                break
+            pattern = read_slot(work, slot_cells[other])
+            if '.' not in pattern:
+                if pattern in used or pattern == word or any(pattern == w for _, w in completed):
+                    break
+                completed.append((other, pattern))
+        else:
+            return written, completed
+        for r, c in written:
+            work[r][c] = '.'
+        return None
+
+    def commit(slot, word, placed):
+        open_slots.discard(slot)
+        used.add(word)
+        for other, completed_word in placed[1]:
+            open_slots.discard(other)
+            used.add(completed_word)
+
+    def undo(frame):
+        slot, candidates, cursor, placed = frame[:4]
+        word = slot_words[slot][candidates[cursor - 1]]
+        if on_event is not None:
+            on_event("undo", slot, word, [(cell, '.') for cell in placed[0]])
+        for r, c in placed[0]:
+            work[r][c] = '.'
+        open_slots.add(slot)
+        used.discard(word)
+        for other, completed_word in placed[1]:
+            open_slots.add(other)
+            used.discard(completed_word)
+        frame[3] = None
+
+    word_bits = {}
+    exclude_key = hash(frozenset(exclude)) if exclude else None
+
+    def state_key():
+        ordered = sorted(open_slots)
+        reachable = {}
+        for slot in ordered:
+            length = len(slot_cells[slot])
+            reachable[length] = reachable.get(length, 0) | slot_mask(slot)
+        blocking = []
+        for word in used:
+            if len(word) in reachable:
+                bit = word_bits.get(word)
+                if bit is None:
+                    bit = word_bits[word] = pattern_mask(index, word)
+                if bit & reachable[len(word)]:
+                    blocking.append(word)
+        return hash((tuple(read_slot(work, slot_cells[slot]) for slot in ordered), frozenset(blocking),
+                     exclude_key))
+
+    # Each frame is [slot, candidate word indices, cursor, placement, nogood key, outcome
+    # mark]; the placement records what the current candidate wrote so it can be undone
+    # exactly, and the mark tells whether anything was yielded or pruned below the frame.
+    stack = []
+    outcomes = [0]
+
+    fingerprint = None
+    if checkpoint_path is not None or resume is not None:
+        fingerprint = index_fingerprint(index)
+    if resume is not None:
+        if resume["fingerprint"] != fingerprint:
+            raise ValueError("Checkpoint was taken with a different word list or complexity")
+        open_slots = set(resume["open_slots"])
+        used = set(resume["used"])
+        stack = [[slot, unpack_indices(candidates), cursor, placed, key, mark]
+                 for slot, candidates, cursor, placed, key, mark in resume["stack"]]
+        outcomes = [resume["outcomes"]]
+        rng.setstate(resume["rng_state"])
+        stats.update(resume["stats"])
+
+    def save_checkpoint():
+        started = time.monotonic()
+        size = write_checkpoint(checkpoint_path, {
+            "grid": [''.join(row) for row in work],
+            "complexity": complexity,
+            "order": order,
+            "fingerprint": fingerprint,
+            "open_slots": sorted(open_slots),
+            "used": sorted(used),
+            "stack": [(slot, pack_indices(candidates), cursor, placed, key, mark)
+                      for slot, candidates, cursor, placed, key, mark in stack],
+            "outcomes": outcomes[0],
+            "rng_state": rng.getstate(),
+            "stats": dict(stats),
+        })
+        stats["checkpoints"] = stats.get("checkpoints", 0) + 1
+        stats["checkpoint_bytes"] = size
+        stats["checkpoint_seconds"] = stats.get("checkpoint_seconds", 0.0) + time.monotonic() - started
+
+    def split_off():
+        """
+        Removes the later half of the untried candidates of the shallowest decision that
+        has any and returns them as grids, each with the grid as it was at that decision
+        plus the word.
+        """
+        for depth, frame in enumerate(stack):
+            if frame[2] < len(frame[1]):
+                break
+        else:
+            return []
+        base = [row[:] for row in work]
+        base_used = set(used)
+        for deeper in stack[depth:]:
+            if deeper[3] is None:
+                continue
+            for r, c in deeper[3][0]:
+                base[r][c] = '.'
+            base_used.discard(slot_words[deeper[0]][deeper[1][deeper[2] - 1]])
+            base_used.difference_update(w for _, w in deeper[3][1])
+
+        slot, candidates, cursor = frame[:3]
+        keep = cursor + (len(candidates) - cursor) // 2
+        grids = []
+        for i in candidates[keep:]:
+            word = slot_words[slot][i]
+            if word in base_used:
+                continue
+            grid = [row[:] for row in base]
+            for (r, c), letter in zip(slot_cells[slot], word):
+                grid[r][c] = letter
+            grids.append(grid)
+        del candidates[keep:]
+        # The frame no longer covers its whole subtree, so it must not become a nogood.
+        outcomes[0] += 1
+        return grids
+
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    next_checkpoint = time.monotonic() + checkpoint_interval
+    polls = 0
+
+    def advance():
+        """
+        Moves the top frame to its next workable candidate, popping exhausted frames.
+
+        :return: Boolean, False once the whole search space is exhausted.
+        """
+        while stack:
+            frame = stack[-1]
+            if frame[3] is not None:
+                undo(frame)
+            slot, candidates, cursor = frame[:3]
+            words = slot_words[slot]
+            while cursor < len(candidates):
+                word = words[candidates[cursor]]
+                cursor += 1
+                if word in used:
+                    continue
+                placed = place(slot, word)
+                if placed is None:
+                    continue
+                frame[2] = cursor
+                frame[3] = placed
+                commit(slot, word, placed)
+                if on_event is not None:
+                    on_event("place", slot, word, [((r, c), work[r][c]) for r, c in placed[0]])
+                if objective is not None and floor is not None:
+                    threshold = floor()
+                    if threshold is not None and upper_bound() <= threshold:
+                        undo(frame)
+                        stats["pruned"] += 1
+                        outcomes[0] += 1
+                        continue
+                stats["placements"] += 1
+                return True
+            stack.pop()
+            stats["backtracks"] += 1
+            if on_event is not None:
+                on_event("backtrack", slot, None, [])
+            if nogoods is not None and frame[5] == outcomes[0]:
+                nogoods.add(frame[4])
+        return False
+
+    while True:
+        if checkpoint_path is not None or deadline is not None:
+            now = time.monotonic()
+            if deadline is not None and now > deadline:
+                if checkpoint_path is not None:
+                    save_checkpoint()
+                return
+            if checkpoint_path is not None and now >= next_checkpoint:
+                save_checkpoint()
+                next_checkpoint = time.monotonic() + checkpoint_interval
+        if stop is not None or wants_work is not None:
+            polls += 1
+            if stop is not None and (on_event is not None or polls % 256 == 0) and stop.is_set():
+                return
+            if polls % 256 == 0 and wants_work is not None and wants_work():
+                grids = split_off()
+                if grids:
+                    stats["donated"] = stats.get("donated", 0) + len(grids)
+                    donate(grids)
+        if not open_slots:
+            outcomes[0] += 1
+            yield [row[:] for row in work]
+            if not advance():
+                return
+            continue
+
+        slot, mask = choose_slot()
+        if not mask:
+            if not advance():
+                return
+            continue
+
+        key = None
+        if nogoods is not None:
+            key = state_key()
+            if nogoods.contains(key):
+                if not advance():
+                    return
+                continue
+
+        candidates = mask_to_indices(mask)
+        if order == "random":
+            rng.shuffle(candidates)
+        elif order == "crossing":
+            candidates.sort(key=lambda i: -word_support(slot, i))
+        stack.append([slot, candidates, 0, None, key, outcomes[0]])
+        if not advance():
+            return
+
+def resume_fill(checkpoint_path, word_dict, index=None, time_limit=None, stats=None,
+                checkpoint_interval=60.0, on_event=None):
+    """
+    Continues a search from a checkpoint file written by iter_fills.
+
+    The search keeps writing to the same checkpoint file, so a fill can be stopped and
+    resumed any number of times.
+
+    :param checkpoint_path: Path of the checkpoint file.
+    :param word_dict: Dictionary of words organized by length; must match the original fill.
+    :param index: Optional pattern index built with the checkpoint's complexity.
+    :param time_limit: Optional number of seconds after which the search stops again.
+    :param stats: Optional dictionary that receives search counters, restored from the checkpoint.
+    :param checkpoint_interval: Float, seconds between checkpoints.
+    :param on_event: Optional callable (kind, slot, word, changes), as for iter_fills.
+    :return: Generator of filled grids (2D lists), continuing the original sequence.
+    """
+    state = read_checkpoint(checkpoint_path)
+    if index is None:
+        index = build_pattern_index(word_dict, state["complexity"])
+    return iter_fills(state["grid"], word_dict, state["complexity"], index=index, order=state["order"],
+                      time_limit=time_limit, stats=stats, checkpoint_path=checkpoint_path,
+                      checkpoint_interval=checkpoint_interval, resume=state, on_event=on_event)
+
+def fill_grid_constrained(grid, word_dict, complexity=25, index=None, rng=None, order="random",
+                          time_limit=None, stats=None, nogoods=None, checkpoint_path=None,
+                          checkpoint_interval=60.0, exclude=None):
+    """
+    Fills the crossword grid around any letters already in it, in place.
+
+    :param grid: 2D list representing the crossword grid; filled in place.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, words must score above this to be used.
+    :param index: Optional pattern index from build_pattern_index, reused across calls.
+    :param rng: Optional random.Random instance used to shuffle candidates.
+    :param order: 'random' to shuffle candidates, 'score' to try the best-scoring words first,
+                  'crossing' to try the words that leave their crossings the most candidates first.
+    :param time_limit: Optional number of seconds after which the search gives up.
+    :param stats: Optional dictionary that receives search counters.
+    :param nogoods: Optional nogood.NogoodCache of dead-end configurations.
+    :param checkpoint_path: Optional path of a checkpoint file to write periodically.
+    :param checkpoint_interval: Float, seconds between checkpoints.
+    :param exclude: Optional iterable of words that may not be placed.
+    :return: Tuple (grid, filled) where filled is True if a complete fill was found.
+    """
+    fill = next(iter_fills(grid, word_dict, complexity, index=index, rng=rng, order=order,
+                           time_limit=time_limit, stats=stats, nogoods=nogoods,
+                           checkpoint_path=checkpoint_path, checkpoint_interval=checkpoint_interval,
+                           exclude=exclude), None)
+    if fill is None:
+        print("NOT FILLED")
+        return grid, False
+    for row, filled_row in zip(grid, fill):
+        row[:] = filled_row
+    return grid, True
@@ -0,0 +1,230 @@
+# live_gui.py
+import argparse
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import Canvas, Scrollbar
+
+from demo import (build_word_dictionary, cell_numbers, create_clues, create_symmetrical_grid2, gui_cell_size,
+                  print_and_store_word_lists)
+from fill_engine import iter_fills
+
+
+class CellBuffer:
+    """
+    Collects the cell changes of fill events on the worker thread and posts only the
+    net changes to the UI queue, at most once per interval, so a search making
+    thousands of placements a second does not flood the Tk event loop.
+    """
+
+    def __init__(self, updates, interval=0.05):
+        self.updates = updates
+        self.interval = interval
+        self.pending = {}
+        self.last = 0.0
+        self.placements = 0
+
+    def on_event(self, kind, slot, word, changes):
+        if kind == "place":
+            self.placements += 1
+        for cell, letter in changes:
+            self.pending[cell] = letter
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self.pending:
+            self.updates.put(("cells", self.pending))
+            self.updates.put(("status", f"Filling... {self.placements} placements"))
+            self.pending = {}
+        self.last = now if now is not None else time.monotonic()
+
+class LiveCrosswordApp:
+    """
+    Crossword window that fills and clues the grid in a background thread.
+
+    The worker thread never touches Tk: it posts messages to a queue that the UI
+    drains every poll_ms with after(), applying each change to the label it concerns.
+    The widget tree is built once from the empty grid; cells and clue lines are then
+    only re-texted when their content changes. Closing the window cancels the fill.
+    """
+
+    def __init__(self, root, grid, word_dict, complexity=35, AImodel="gpt-3.5-turbo", index=None,
+                 time_limit=120, clue_fn=create_clues, concurrency=4, poll_ms=50):
+        self.root = root
+        self.grid = [list(row) for row in grid]
+        self.word_dict = word_dict
+        self.complexity = complexity
+        self.AImodel = AImodel
+        self.index = index
+        self.time_limit = time_limit
+        self.clue_fn = clue_fn
+        self.concurrency = concurrency
+        self.poll_ms = poll_ms
+        self.updates = queue.Queue()
+        self.stop = threading.Event()
+        self.closed = False
+        self.shown = {}
+        self.letters = {}
+        self.clue_labels = {}
+        self.build()
+        root.protocol("WM_DELETE_WINDOW", self.close)
+
+    ## WIDGETS
+
+    def build(self):
+        self.root.title("Crossword Puzzle")
+        size = gui_cell_size(self.grid)
+        numbered_words = print_and_store_word_lists(self.grid)
+        numbers = cell_numbers(numbered_words)
+
+        grid_frame = tk.Frame(self.root)
+        grid_frame.pack(side=tk.LEFT, padx=10, pady=10)
+        for r, row in enumerate(self.grid):
+            for c, cell in enumerate(row):
+                frame = tk.Frame(grid_frame, width=size, height=size, borderwidth=1, relief="solid",
+                                 bg='black' if cell == '#' else 'white')
+                frame.grid(row=r, column=c, sticky="nsew")
+                frame.grid_propagate(False)
+                if cell == '#':
+                    continue
+                if (r, c) in numbers:
+                    tk.Label(frame, text=str(numbers[(r, c)]), bg='white', font=('Arial', 8)).place(x=0, y=0)
+                letter = tk.Label(frame, text='' if cell == '.' else cell, bg='white',
+                                  font=('Arial', max(8, size // 2)))
+                letter.place(relx=0.5, rely=0.6, anchor="center")
+                self.letters[(r, c)] = letter
+                self.shown[(r, c)] = cell
+
+        side = tk.Frame(self.root)
+        side.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.status = tk.Label(side, text="Starting...", anchor='w')
+        self.status.pack(fill=tk.X)
+
+        canvas = Canvas(side, width=650, height=600)
+        scrollbar = Scrollbar(side, orient="vertical", command=canvas.yview)
+        scrollable_frame = tk.Frame(canvas)
+        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        for category in ["Across", "Down"]:
+            column = tk.Frame(scrollable_frame)
+            column.pack(side=tk.LEFT, fill=tk.BOTH, padx=5)
+            tk.Label(column, text=category, font=('Arial', 14)).pack(anchor='w')
+            for num in sorted(numbered_words[category]):
+                label = tk.Label(column, text=f"{num}. ...", wraplength=300, justify=tk.LEFT)
+                label.pack(anchor='w')
+                self.clue_labels[(category, num)] = label
+
+    def set_cell(self, cell, letter):
+        if self.shown.get(cell) != letter and cell in self.letters:
+            self.shown[cell] = letter
+            self.letters[cell].config(text='' if letter == '.' else letter)
+
+    ## UPDATES
+
+    def start(self):
+        threading.Thread(target=self.generate, daemon=True).start()
+        self.root.after(self.poll_ms, self.poll)
+        return self
+
+    def generate(self):
+        """
+        Runs on the worker thread: fills the grid, then writes clues as they arrive.
+        """
+        post = self.updates.put
+        try:
+            buffer = CellBuffer(self.updates)
+            start = time.time()
+            fill = next(iter_fills(self.grid, self.word_dict, self.complexity, index=self.index,
+                                   time_limit=self.time_limit, stop=self.stop, on_event=buffer.on_event), None)
+            buffer.flush()
+            if self.stop.is_set():
+                return
+            if fill is None:
+                post(("status", "Not filled"))
+                return
+            post(("filled", fill))
+            post(("status", f"Filled in {time.time() - start:.1f} seconds. Generating clues..."))
+            numbered_words = print_and_store_word_lists(fill)
+            self.clue_fn(numbered_words, self.AImodel, concurrency=self.concurrency,
+                         on_clue=lambda category, num, word, clue: post(("clue", category, num, clue)))
+            post(("status", f"Done in {time.time() - start:.1f} seconds"))
+        except Exception as error:
+            post(("status", f"Failed: {error}"))
+
+    def apply(self, message):
+        kind = message[0]
+        if kind == "cells":
+            for cell, letter in message[1].items():
+                self.set_cell(cell, letter)
+        elif kind == "filled":
+            for r, row in enumerate(message[1]):
+                for c, letter in enumerate(row):
+                    self.set_cell((r, c), letter)
+        elif kind == "clue":
+            _, category, num, clue = message
+            label = self.clue_labels.get((category, num))
+            if label is not None:
+                label.config(text=f"{num}. {clue}")
+        elif kind == "status":
+            self.status.config(text=message[1])
+
+    def poll(self, max_messages=500):
+        """
+        Applies the queued updates, a bounded number per tick so the window keeps
+        handling input, and schedules the next tick.
+        """
+        if self.closed:
+            return
+        for _ in range(max_messages):
+            try:
+                message = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            self.apply(message)
+        self.root.after(self.poll_ms, self.poll)
+
+    def close(self):
+        self.closed = True
+        self.stop.set()
+        self.root.destroy()
+
+def create_crossword_gui_live(grid, word_dict, complexity=35, AImodel="gpt-3.5-turbo", index=None,
+                              time_limit=120, clue_fn=create_clues):
+    """
+    Opens a window that fills and clues the grid while showing progress.
+
+    :param clue_fn: Function (numbered_words, AImodel, concurrency=..., on_clue=...) -> clues,
+                    create_clues by default.
+    """
+    root = tk.Tk()
+    LiveCrosswordApp(root, grid, word_dict, complexity, AImodel, index, time_limit, clue_fn).start()
+    root.mainloop()
+
+
+if __name__ == '__main__':
+    from bench_fill import LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Fill and clue a puzzle with live progress")
+    parser.add_argument("--mock", action="store_true", help="write clues with the local mock LLM server")
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    args = parser.parse_args()
+
+    clue_fn = create_clues
+    if args.mock:
+        from openai import OpenAI
+        from mock_llm import MockLLM, start_mock_server
+
+        server, base_url = start_mock_server(MockLLM(mean=0.5))
+        client = OpenAI(base_url=base_url, api_key="mock", max_retries=0)
+        clue_fn = lambda words, model, **options: create_clues(words, model, client=client, **options)
+
+    create_crossword_gui_live(create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"]),
+                              build_word_dictionary('spreadthewordlist_caps.dict'), 35, args.model,
+                              clue_fn=clue_fn)
@@ -0,0 +1,129 @@
+# llm_client.py
+import fcntl
+import json
+import os
+import threading
+import time
+
+import httpx
+from openai import OpenAI
+
+
+## SHARED CLIENT
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url=None, max_connections=20, max_keepalive=10, keepalive_expiry=60.0):
+    """
+    Returns a long-lived OpenAI client for this process, creating it on first use.
+
+    The client keeps a pool of keep-alive connections so consecutive clue requests
+    reuse TLS sessions instead of reconnecting. Clients are cached per process id,
+    so a worker forked from a parent that already made one gets its own. The SDK's
+    own retries are turned off: request_completion owns retry, backoff, telemetry
+    and rate-limit accounting, and would not see retries made inside the SDK. It
+    retries twice by default, as the SDK did.
+
+    :param base_url: Optional API base URL (e.g. a local mock server).
+    :param max_connections: Integer, the connection pool size.
+    :param max_keepalive: Integer, idle connections kept open for reuse.
+    :param keepalive_expiry: Float, seconds an idle connection stays open.
+    :return: OpenAI client.
+    """
+    key = (os.getpid(), base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                  keepalive_expiry=keepalive_expiry)
+            client = OpenAI(base_url=base_url, http_client=httpx.Client(limits=limits), max_retries=0)
+            _clients[key] = client
+        return client
+
+def estimate_tokens(messages, max_tokens):
+    """
+    Estimates the tokens a chat request will use (about four characters per token).
+    """
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+## RATE LIMITING
+
+class FileRateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute, shared by
+    every process that points at the same state file. The buckets live in a small
+    JSON file and each update happens under an exclusive flock on a sibling lock
+    file, so worker processes draw from one budget instead of each assuming the full
+    API quota. POSIX only.
+    """
+
+    def __init__(self, path, requests_per_minute=3500, tokens_per_minute=90000):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    def _update(self, requests, tokens, force=False):
+        """
+        Refills both buckets and takes the amounts if available (or unconditionally with force).
+
+        :return: Float, 0.0 if taken, otherwise the seconds to wait before trying again.
+        """
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                try:
+                    with open(self.path) as state_file:
+                        state = json.load(state_file)
+                except (OSError, ValueError):
+                    state = {"requests": self.requests_per_minute, "tokens": self.tokens_per_minute, "updated": now}
+
+                elapsed = max(0.0, now - state["updated"])
+                available_requests = min(self.requests_per_minute,
+                                         state["requests"] + elapsed * self.requests_per_minute / 60)
+                available_tokens = min(self.tokens_per_minute,
+                                       state["tokens"] + elapsed * self.tokens_per_minute / 60)
+
+                wait = 0.0
+                if not force:
+                    if available_requests < requests:
+                        wait = max(wait, (requests - available_requests) * 60 / self.requests_per_minute)
+                    if available_tokens < tokens:
+                        wait = max(wait, (tokens - available_tokens) * 60 / self.tokens_per_minute)
+                if wait == 0.0:
+                    available_requests -= requests
+                    available_tokens -= tokens
+
+                state = {"requests": available_requests, "tokens": available_tokens, "updated": now}
+                tmp_path = self.path + f".{os.getpid()}.tmp"
+                with open(tmp_path, "w") as state_file:
+                    json.dump(state, state_file)
+                os.replace(tmp_path, self.path)
+                return wait
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def acquire(self, tokens=0):
+        """
+        Blocks until one request and the given number of tokens fit in the budget.
+
+        :param tokens: Integer, the estimated tokens of the request.
+        :return: Float, the seconds spent waiting.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        waited = 0.0
+        while True:
+            wait = self._update(1, tokens)
+            if wait == 0.0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """
+        Corrects the token bucket once the response reports the real usage.
+        """
+        if actual_tokens != estimated_tokens:
+            self._update(0, actual_tokens - estimated_tokens, force=True)
@@ -0,0 +1,307 @@
+# minis.py
+import heapq
+import time
+
+from demo import build_word_dictionary, create_symmetrical_grid2, get_slots, print_grid
+
+
+## PREFIX TABLES
+
+def build_prefix_tables(word_dict, complexity=25, lengths=None):
+    """
+    Builds, for each word length, a table from every prefix of a usable word to a
+    bitmask (by ord) of the letters that can follow it, plus the best score of a word
+    starting with each prefix (a complete word's own score).
+
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, only words scoring above this are used.
+    :param lengths: Optional collection of the lengths to build; every length by default.
+    :return: Dictionary {length: (prefixes, best)} with prefixes {prefix: mask} and best {prefix or word: score}.
+    """
+    tables = {}
+    for length, word_list in word_dict.items():
+        if lengths is not None and length not in lengths:
+            continue
+        scores = {}
+        for word, points in word_list:
+            if points > complexity and points > scores.get(word, -1):
+                scores[word] = points
+        tables[length] = prefix_table(scores.items(), length)
+    return tables
+
+def prefix_table(scored_words, length):
+    """
+    Builds the (prefixes, best) table of build_prefix_tables from (word, score) pairs of one length.
+    """
+    prefixes = {}
+    best = {}
+    for word, points in scored_words:
+        best[word] = points
+        for pos in range(length):
+            prefix = word[:pos]
+            prefixes[prefix] = prefixes.get(prefix, 0) | (1 << ord(word[pos]))
+            if points > best.get(prefix, -1):
+                best[prefix] = points
+    return prefixes, best
+
+def mask_letters(mask, cache):
+    """
+    Lists the letters in a mask, memoized in cache.
+    """
+    letters = cache.get(mask)
+    if letters is None:
+        letters = cache[mask] = ''.join(chr(i) for i in range(mask.bit_length()) if mask >> i & 1)
+    return letters
+
+## SEARCH
+
+def _search(grid, tables, distinct=True, stop=None, objective=None, floor=None, rng=None):
+    """
+    Cell-by-cell depth-first search in reading order. Every cell is reached after the
+    cells before it in its across and down runs, so the letters that can go there are
+    the AND of the two runs' prefix masks. A run holding letters from the grid gets
+    tables built from only the words that fit them, so a fixed letter late in a run
+    already narrows its first cells. Yields the list of run contents (the complete
+    entries) for every fill, reusing the list between yields.
+
+    With an objective, letters are tried in order of the best scores they leave
+    reachable, and a letter is skipped when the bound (every run completed with the
+    best word its prefix allows) cannot beat floor(). An rng shuffles the letters
+    first, so letters with equal bounds are tried in a random order.
+    """
+    runs = get_slots(grid, min_length=1)
+    any_letter = 0
+    for prefixes, _ in tables.values():
+        any_letter |= prefixes.get('', 0)
+
+    run_tables = []
+    run_best = []
+    cell_runs = {}
+    for i, (direction, row, col, length) in enumerate(runs):
+        if length == 1:
+            run_tables.append({'': any_letter})
+            run_best.append(None)
+        else:
+            prefixes, best = tables.get(length, ({}, {}))
+            pattern = [grid[row][col + pos] if direction == "Across" else grid[row + pos][col]
+                       for pos in range(length)]
+            if any(letter not in '#.' for letter in pattern):
+                prefixes, best = prefix_table(
+                    ((word, points) for word, points in best.items() if len(word) == length
+                     and all(letter == '.' or letter == word[pos] for pos, letter in enumerate(pattern))),
+                    length)
+            run_tables.append(prefixes)
+            run_best.append(best)
+        for pos in range(length):
+            cell = (row, col + pos) if direction == "Across" else (row + pos, col)
+            cell_runs.setdefault(cell, []).append((i, pos, length))
+
+    cells = sorted(cell_runs)
+    plan = []
+    for cell in cells:
+        (across, across_pos, across_length), (down, down_pos, down_length) = sorted(cell_runs[cell])
+        letter = grid[cell[0]][cell[1]]
+        fixed = 1 << ord(letter) if letter != '.' else -1
+        plan.append((across, across_pos, across_pos == across_length - 1 and across_length > 1,
+                     down, down_pos, down_pos == down_length - 1 and down_length > 1, fixed))
+
+    n = len(plan)
+    if n == 0:
+        return
+    words = [''] * len(runs)
+    used = set()
+    added = [()] * n
+    saved = [None] * n
+    options = [''] * n
+    cursor = [0] * n
+    letter_cache = {}
+
+    scored = [i for i, best in enumerate(run_best) if best is not None]
+    combine = min if objective == "min" else sum
+    bounds = [best.get('', 0) if best is not None else 0 for best in run_best]
+
+    def bound_with(across, across_word, down, down_word):
+        old_across, old_down = bounds[across], bounds[down]
+        if run_best[across] is not None:
+            bounds[across] = run_best[across].get(across_word, 0)
+        if run_best[down] is not None:
+            bounds[down] = run_best[down].get(down_word, 0)
+        value = combine(bounds[i] for i in scored)
+        bounds[across], bounds[down] = old_across, old_down
+        return value
+
+    def candidates(k):
+        across, across_pos, _, down, down_pos, _, fixed = plan[k]
+        across_prefix = words[across][:across_pos]
+        mask = run_tables[across].get(across_prefix, 0)
+        if mask:
+            down_prefix = words[down][:down_pos]
+            mask &= run_tables[down].get(down_prefix, 0) & fixed
+        letters = mask_letters(mask, letter_cache)
+        if rng is not None and len(letters) > 1:
+            letters = list(letters)
+            rng.shuffle(letters)
+        if objective is not None and len(letters) > 1:
+            letters = sorted(letters, key=lambda letter: -bound_with(across, across_prefix + letter,
+                                                                     down, down_prefix + letter))
+        return letters
+
+    k = 0
+    options[0] = candidates(0)
+    polls = 0
+    while k >= 0:
+        if stop is not None:
+            polls += 1
+            if polls % 4096 == 0 and stop():
+                return
+        for word in added[k]:
+            used.discard(word)
+        added[k] = ()
+        if saved[k] is not None:
+            bounds[plan[k][0]], bounds[plan[k][3]] = saved[k]
+            saved[k] = None
+        if cursor[k] >= len(options[k]):
+            k -= 1
+            continue
+        letter = options[k][cursor[k]]
+        cursor[k] += 1
+        across, across_pos, across_done, down, down_pos, down_done, _ = plan[k]
+        across_word = words[across][:across_pos] + letter
+        down_word = words[down][:down_pos] + letter
+        if floor is not None:
+            threshold = floor()
+            if threshold is not None and bound_with(across, across_word, down, down_word) <= threshold:
+                continue
+        if distinct and (across_done or down_done):
+            completed = [word for word, done in ((across_word, across_done), (down_word, down_done)) if done]
+            if any(word in used for word in completed) or (len(completed) == 2 and across_word == down_word):
+                continue
+            used.update(completed)
+            added[k] = completed
+        words[across] = across_word
+        words[down] = down_word
+        saved[k] = bounds[across], bounds[down]
+        if run_best[across] is not None:
+            bounds[across] = run_best[across].get(across_word, 0)
+        if run_best[down] is not None:
+            bounds[down] = run_best[down].get(down_word, 0)
+        if k + 1 == n:
+            yield words
+            continue
+        k += 1
+        options[k] = candidates(k)
+        cursor[k] = 0
+
+def _grid_from_runs(grid, runs, words):
+    fill = [list(row) for row in grid]
+    for (direction, row, col, length), word in zip(runs, words):
+        if direction == "Across":
+            fill[row][col:col + length] = word
+    return fill
+
+def iter_minis(grid, word_dict=None, complexity=25, tables=None, distinct=True):
+    """
+    Yields every fill of an open or nearly open mini grid, lazily, in a fixed order.
+
+    Unlike fill_grid_sam, which places whole words and wipes columns on a conflict,
+    the search goes cell by cell through per-length prefix tables, so a dead prefix in
+    any row or column is cut at the letter that causes it. Letters already in the grid
+    are kept. Runs of a single cell can take any letter.
+
+    :param grid: 2D list representing the crossword grid; it is not modified.
+    :param word_dict: Dictionary of words organized by length; not needed with tables.
+    :param complexity: Integer, words must score above this to be used.
+    :param tables: Optional prefix tables from build_prefix_tables, reused across calls.
+    :param distinct: Boolean, reject fills that use a word twice (as in a symmetric word square).
+    :return: Generator of filled grids (2D lists).
+    """
+    runs = get_slots(grid, min_length=1)
+    if tables is None:
+        tables = build_prefix_tables(word_dict, complexity, {length for _, _, _, length in runs})
+    for words in _search(grid, tables, distinct):
+        yield _grid_from_runs(grid, runs, words)
+
+def best_minis(grid, word_dict=None, k=1, complexity=25, objective="sum", tables=None, distinct=True,
+               time_limit=None, stats=None, rng=None):
+    """
+    Finds the k highest-scoring fills of a mini grid over its complete solution set.
+
+    Letters are tried best-bound first and, once k fills are known, every prefix that
+    cannot lead to a better fill than the weakest of them is cut (branch and bound),
+    so the whole set is covered without visiting most of it. The result is exact
+    unless time_limit runs out first (stats['exhausted'] says which).
+
+    Scores come in a few coarse values, so many fills usually tie for the best score.
+    Without rng the first of them in alphabetical order wins every time; an rng breaks
+    the ties at random, so repeated calls return different fills of the same score.
+
+    :param grid: 2D list representing the crossword grid; it is not modified.
+    :param word_dict: Dictionary of words organized by length; not needed with tables.
+    :param k: Integer, the number of fills to return.
+    :param complexity: Integer, words must score above this to be used.
+    :param objective: 'sum' or 'min' of the entries' scores from the .dict file.
+    :param tables: Optional prefix tables from build_prefix_tables, reused across calls.
+    :param distinct: Boolean, reject fills that use a word twice.
+    :param time_limit: Optional number of seconds after which the scan stops.
+    :param stats: Optional dictionary that receives 'fills' (complete fills reached), 'seconds'
+                  and 'exhausted'.
+    :param rng: Optional random.Random instance used to break ties between equal scores.
+    :return: List of tuples (score, grid), best first; empty if the grid has no fill.
+    """
+    if objective not in ("sum", "min"):
+        raise ValueError(f"Unknown objective {objective!r}, expected 'sum' or 'min'")
+    runs = get_slots(grid, min_length=1)
+    if tables is None:
+        tables = build_prefix_tables(word_dict, complexity, {length for _, _, _, length in runs})
+    entries = [(i, tables[length][1]) for i, (_, _, _, length) in enumerate(runs) if length > 1]
+    combine = min if objective == "min" else sum
+
+    start = time.time()
+    stopped = []
+
+    def stop():
+        if time_limit is not None and time.time() - start > time_limit:
+            stopped.append(True)
+        return bool(stopped)
+
+    # Min-heap of the best k fills so far, as (score, counter, entries); the counter breaks ties.
+    heap = []
+    count = 0
+
+    def floor():
+        return heap[0][0] if len(heap) >= k else None
+
+    for words in _search(grid, tables, distinct, stop, objective, floor, rng):
+        count += 1
+        score = combine(scores[words[i]] for i, scores in entries)
+        if len(heap) < k:
+            heapq.heappush(heap, (score, -count, list(words)))
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, (score, -count, list(words)))
+
+    seconds = time.time() - start
+    if stats is not None:
+        stats["fills"] = count
+        stats["seconds"] = seconds
+        stats["exhausted"] = not stopped
+    return [(score, _grid_from_runs(grid, runs, words)) for score, _, words in sorted(heap, reverse=True)]
+
+
+if __name__ == '__main__':
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    for size in (4, 5):
+        stats = {}
+        crossword_grid = create_symmetrical_grid2(size, size, [])
+        fills = best_minis(crossword_grid, word_dict, k=1, complexity=35, time_limit=120, stats=stats)
+        print(f"{size}x{size}: best of the solution set in {stats['seconds']:.2f} seconds "
+              f"({stats['fills']} fills reached), exhausted={stats['exhausted']}")
+        for score, fill in fills:
+            print(score)
+            print_grid(fill)
+            print()
+
+    # Fills stream lazily, so the first few of a large solution set come back at once.
+    start = time.time()
+    for i, fill in zip(range(1000), iter_minis(create_symmetrical_grid2(5, 5, []), word_dict, 35)):
+        pass
+    print(f"First {i + 1} 5x5 fills in {time.time() - start:.2f} seconds")
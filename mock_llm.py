@@ -0,0 +1,193 @@
+# mock_llm.py
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+## LATENCY
+
+def sample_latency(rng, distribution="lognormal", mean=0.8, spread=0.5):
+    """
+    Draws one response latency in seconds.
+
+    :param rng: random.Random instance.
+    :param distribution: 'fixed', 'uniform', 'exponential' or 'lognormal'.
+    :param mean: Float, the mean latency in seconds.
+    :param spread: Float, half-width for 'uniform', sigma of the underlying normal for 'lognormal'.
+    :return: Float seconds.
+    """
+    if distribution == "fixed":
+        return mean
+    if distribution == "uniform":
+        return max(0.0, rng.uniform(mean - spread, mean + spread))
+    if distribution == "exponential":
+        return rng.expovariate(1 / mean) if mean > 0 else 0.0
+    if distribution == "lognormal":
+        # Pick mu so the distribution's mean is the requested mean.
+        if mean <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(mean) - spread ** 2 / 2, spread)
+    raise ValueError(f"Unknown latency distribution {distribution!r}")
+
+def count_tokens(text):
+    """
+    Approximates the token count of a text (about four characters per token).
+    """
+    return max(1, len(text) // 4)
+
+## SERVER
+
+class MockLLM:
+    """
+    Settings and counters of a stand-in for the chat-completions endpoint create_clues uses.
+    Replies are canned clues; latency, 429s and 500s follow the configured rates.
+    """
+
+    def __init__(self, distribution="lognormal", mean=0.8, spread=0.5, rate_limit_rate=0.0,
+                 error_rate=0.0, seed=None):
+        self.distribution = distribution
+        self.mean = mean
+        self.spread = spread
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "rate_limited": 0, "errors": 0,
+                         "prompt_tokens": 0, "completion_tokens": 0}
+
+    def draw(self):
+        """
+        Decides the fate of one request.
+
+        :return: Tuple (latency seconds, HTTP status).
+        """
+        with self.lock:
+            latency = sample_latency(self.rng, self.distribution, self.mean, self.spread)
+            roll = self.rng.random()
+            self.counters["requests"] += 1
+            if roll < self.rate_limit_rate:
+                self.counters["rate_limited"] += 1
+                return latency / 10, 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.counters["errors"] += 1
+                return latency, 500
+            return latency, 200
+
+    def complete(self, request):
+        """
+        Builds a chat-completions response body for a request body.
+        """
+        messages = request.get("messages", [])
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        user = messages[-1].get("content", "") if messages else ""
+        single = re.match(r"Create a clue for the word (\w+):", user)
+        if single:
+            content = f"Mock clue for {single.group(1)}"
+        else:
+            words = [line.strip() for line in user.splitlines() if line.strip()]
+            content = "\n".join(f"{word}: Mock clue for {word}" for word in words)
+
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = count_tokens(content)
+        with self.lock:
+            self.counters["prompt_tokens"] += prompt_tokens
+            self.counters["completion_tokens"] += completion_tokens
+        return {
+            "id": f"chatcmpl-mock-{self.counters['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+def make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                return
+            latency, status = mock.draw()
+            time.sleep(latency)
+            if status == 429:
+                self.send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                               {"Retry-After": "1"})
+            elif status != 200:
+                self.send_json(status, {"error": {"message": "Injected server error", "type": "server_error"}})
+            else:
+                self.send_json(200, mock.complete(json.loads(body or b"{}")))
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self.send_json(200, mock.stats())
+            else:
+                self.send_json(404, {"error": {"message": "not found"}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def start_mock_server(mock, host="127.0.0.1", port=0):
+    """
+    Starts the mock server on a background thread.
+
+    :param mock: MockLLM with the latency and error settings.
+    :param port: Integer, 0 to pick a free port.
+    :return: Tuple (server, base_url) where base_url is ready for OpenAI(base_url=...).
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for the chat-completions API")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=["fixed", "uniform", "exponential", "lognormal"])
+    parser.add_argument("--mean", type=float, default=0.8)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    mock = MockLLM(args.distribution, args.mean, args.spread, args.rate_limit_rate, args.error_rate, args.seed)
+    server, base_url = start_mock_server(mock, port=args.port)
+    print(f"Mock chat-completions API at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,92 @@
+# nogood.py
+from collections import OrderedDict
+
+
+class NogoodCache:
+    """
+    Bounded set of partial configurations already known to lead to a dead end.
+
+    Keys are hashes of the letters in a group of crossing slots. The least recently
+    used entry is evicted once max_size is reached, and hits, misses and evictions
+    are counted so the size can be tuned.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def contains(self, key):
+        """
+        Checks if a configuration is a known dead end, counting the lookup.
+
+        :param key: Hashable key describing the configuration.
+        :return: Boolean, True if the configuration failed before.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key):
+        """
+        Records a configuration as a dead end, evicting the oldest entry if full.
+
+        :param key: Hashable key describing the configuration.
+        """
+        self.entries[key] = True
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Forgets every entry and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the counters used for tuning.
+
+        :return: Dictionary with size, max_size, hits, misses, evictions and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def crossing_key(grid, row, col, length):
+    """
+    Builds the nogood key of an across slot from the letters in its crossing columns.
+
+    :param grid: 2D list representing the crossword grid.
+    :param row: Integer, the row of the slot.
+    :param col: Integer, the starting column of the slot.
+    :param length: Integer, the length of the slot.
+    :return: Integer hash of the slot position and the current contents of each crossing column.
+    """
+    columns = []
+    for j in range(col, col + length):
+        start = row
+        while start > 0 and grid[start - 1][j] != '#':
+            start -= 1
+        end = row
+        while end < len(grid) and grid[end][j] != '#':
+            end += 1
+        columns.append(''.join(grid[i][j] for i in range(start, end)))
+    return hash((row, col, length, tuple(columns)))
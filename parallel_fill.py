@@ -0,0 +1,220 @@
+# parallel_fill.py
+import multiprocessing
+import queue
+import random
+import time
+
+from demo import build_word_dictionary, create_symmetrical_grid2, print_grid
+from fill_engine import build_pattern_index, build_slot_map, iter_fills, mask_to_indices, pattern_mask, read_slot
+
+
+## SPLITTING
+
+def split_grid(grid, index, count, rng=None, exclude=None):
+    """
+    Splits the search tree of a grid at its first decisions into disjoint subproblems.
+
+    The subproblem with the most open slots is expanded on the open slot with the
+    fewest candidates, one child per candidate that keeps every crossing slot
+    workable and repeats no word, until there are at least count subproblems.
+    Every fill of the grid is a fill of exactly one subproblem.
+
+    :param grid: 2D list representing the crossword grid; it is not modified.
+    :param index: Pattern index as returned by build_pattern_index.
+    :param count: Integer, the number of subproblems wanted.
+    :param rng: Optional random.Random instance used to shuffle the subproblems.
+    :param exclude: Optional iterable of words that may not be placed.
+    :return: List of grids (2D lists).
+    """
+    slots, slot_cells, crossings = build_slot_map(grid)
+    excluded = set(exclude or ())
+
+    def open_slots(g):
+        return [slot for slot, cells in enumerate(slot_cells) if '.' in read_slot(g, cells)]
+
+    def children(g):
+        slot = min(open_slots(g), key=lambda s: pattern_mask(index, read_slot(g, slot_cells[s])).bit_count())
+        cells = slot_cells[slot]
+        used = {read_slot(g, c) for c in slot_cells if '.' not in read_slot(g, c)}
+        words = index.get(len(cells), {"words": []})["words"]
+        result = []
+        for i in mask_to_indices(pattern_mask(index, read_slot(g, cells))):
+            word = words[i]
+            if word in used or word in excluded:
+                continue
+            child = [row[:] for row in g]
+            for (r, c), letter in zip(cells, word):
+                child[r][c] = letter
+            entries = [read_slot(child, slot_cells[other]) for other in crossings[slot]]
+            if all(pattern_mask(index, entry) for entry in entries):
+                complete = [entry for entry in entries if '.' not in entry]
+                if (word not in complete and not used.intersection(complete) and not excluded.intersection(complete)
+                        and len(set(complete)) == len(complete)):
+                    result.append(child)
+        return result
+
+    subproblems = [[list(row) for row in grid]]
+    while len(subproblems) < count:
+        subproblems.sort(key=lambda g: len(open_slots(g)))
+        if not open_slots(subproblems[-1]):
+            break
+        subproblems.extend(children(subproblems.pop()))
+        if not subproblems:
+            break
+    if rng is not None:
+        rng.shuffle(subproblems)
+    return subproblems
+
+## WORKERS
+
+# Shared counters: subproblems waiting in the queue, subproblems being searched, idle workers.
+QUEUED, ACTIVE, IDLE = 0, 1, 2
+
+def _fill_worker(tasks, results, counters, stop, index, complexity, order, seed, exclude):
+    """
+    Takes subproblems from the queue until told to stop, giving part of its current
+    subtree back to the queue whenever another worker sits idle with nothing queued.
+    """
+    tasks.cancel_join_thread()
+    rng = random.Random(seed)
+    stats = {"subproblems": 0}
+
+    def wants_work():
+        return counters[IDLE] > counters[QUEUED]
+
+    def donate(grids):
+        with counters.get_lock():
+            counters[QUEUED] += len(grids)
+        for grid in grids:
+            tasks.put(grid)
+
+    while True:
+        with counters.get_lock():
+            counters[IDLE] += 1
+        grid = tasks.get()
+        with counters.get_lock():
+            counters[IDLE] -= 1
+        if grid is None:
+            break
+        with counters.get_lock():
+            counters[QUEUED] -= 1
+            counters[ACTIVE] += 1
+        if not stop.is_set():
+            stats["subproblems"] += 1
+            for fill in iter_fills(grid, None, complexity, index=index, rng=rng, order=order, stats=stats,
+                                   stop=stop, wants_work=wants_work, donate=donate, exclude=exclude):
+                results.put(("fill", fill))
+                stop.set()
+                break
+        with counters.get_lock():
+            counters[ACTIVE] -= 1
+    results.put(("stats", stats))
+
+## PARALLEL FILL
+
+def parallel_fill(grid, word_dict, complexity=25, workers=None, index=None, order="random",
+                  time_limit=None, seed=None, stats=None, split_factor=4, exclude=None):
+    """
+    Fills the crossword grid in place with several processes searching disjoint parts of one tree.
+
+    Unlike independent random restarts, no two workers ever explore the same partial
+    fill: the tree is split at its first decisions into split_factor subproblems per
+    worker, and a worker whose subproblem runs out early takes the next one from the
+    shared queue. When the queue is empty and a worker is idle, a busy worker donates
+    the untried candidates of its shallowest decision, so the load stays balanced
+    until the first fill is found and the rest are cancelled through a shared Event.
+
+    :param grid: 2D list representing the crossword grid; filled in place.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, words must score above this to be used.
+    :param workers: Optional number of worker processes (defaults to the CPU count).
+    :param index: Optional pattern index from build_pattern_index.
+    :param order: 'random' to shuffle candidates, 'score' to try the best-scoring words first,
+                  'crossing' to try the words that leave their crossings the most candidates first.
+    :param time_limit: Optional number of seconds after which the search gives up.
+    :param seed: Optional integer; worker i shuffles with seed + i.
+    :param stats: Optional dictionary that receives the search counters summed over workers,
+                  plus 'subproblems' (searched) and 'donated' (handed to other workers).
+    :param split_factor: Integer, initial subproblems per worker.
+    :param exclude: Optional iterable of words that may not be placed.
+    :return: Tuple (grid, filled) where filled is True if a complete fill was found.
+    """
+    if index is None:
+        index = build_pattern_index(word_dict, complexity)
+    workers = workers or multiprocessing.cpu_count()
+    if stats is None:
+        stats = {}
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+
+    rng = random.Random(seed) if order == "random" else None
+    exclude = frozenset(exclude or ())
+    subproblems = split_grid(grid, index, workers * split_factor, rng, exclude)
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    counters = multiprocessing.Array('i', 3)
+    stop = multiprocessing.Event()
+    counters[QUEUED] = len(subproblems)
+    for subproblem in subproblems:
+        tasks.put(subproblem)
+
+    processes = []
+    for i in range(workers):
+        worker_seed = None if seed is None else seed + i
+        process = multiprocessing.Process(target=_fill_worker, daemon=True,
+                                          args=(tasks, results, counters, stop, index, complexity, order, worker_seed,
+                                                exclude))
+        process.start()
+        processes.append(process)
+
+    fill = None
+    while True:
+        try:
+            kind, payload = results.get(timeout=0.05)
+        except queue.Empty:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            with counters.get_lock():
+                if counters[QUEUED] == 0 and counters[ACTIVE] == 0:
+                    break
+            continue
+        if kind == "fill":
+            fill = payload
+            break
+        # A worker only reports stats after its sentinel, so anything else is unexpected here.
+        raise RuntimeError(f"Unexpected message {kind!r} from fill worker")
+
+    stop.set()
+    for _ in processes:
+        tasks.put(None)
+    reported = 0
+    while reported < len(processes):
+        kind, payload = results.get()
+        if kind != "stats":
+            continue
+        reported += 1
+        for key, value in payload.items():
+            stats[key] = stats.get(key, 0) + value
+    for process in processes:
+        process.join()
+
+    if fill is None:
+        print("NOT FILLED")
+        return grid, False
+    for row, filled_row in zip(grid, fill):
+        row[:] = filled_row
+    return grid, True
+
+
+if __name__ == '__main__':
+    from bench_fill import LAYOUTS
+
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    index = build_pattern_index(word_dict, 35)
+    for workers in (1, 2, 4):
+        crossword_grid = create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"])
+        stats = {}
+        start = time.time()
+        crossword_grid, filled = parallel_fill(crossword_grid, word_dict, 35, workers=workers, index=index,
+                                               time_limit=120, seed=0, stats=stats)
+        print(f"{workers} workers: filled={filled} in {time.time() - start:.2f} seconds, {stats}")
+    print_grid(crossword_grid)
@@ -0,0 +1,279 @@
+# patterns.py
+import math
+import random
+
+from demo import get_slots, print_grid, build_word_dictionary
+
+
+## HELPERS
+
+def symmetric_cell(grid, row, col):
+    """
+    Returns the cell paired with (row, col) under 180-degree rotation.
+
+    :param grid: 2D list representing the crossword grid.
+    :param row: Integer, the row of the cell.
+    :param col: Integer, the column of the cell.
+    :return: Tuple (row, col) of the symmetric counterpart.
+    """
+    return len(grid) - row - 1, len(grid[0]) - col - 1
+
+def count_black_squares(grid):
+    """
+    Counts the black squares in the grid.
+
+    :param grid: 2D list representing the crossword grid.
+    :return: Integer, the number of '#' cells.
+    """
+    return sum(cell == '#' for row in grid for cell in row)
+
+def is_connected(grid):
+    """
+    Checks that every open cell can be reached from every other open cell.
+
+    :param grid: 2D list representing the crossword grid.
+    :return: Boolean, True if the open cells form a single region.
+    """
+    open_cells = [(r, c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell != '#']
+    if not open_cells:
+        return False
+
+    seen = {open_cells[0]}
+    stack = [open_cells[0]]
+    while stack:
+        r, c = stack.pop()
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < len(grid) and 0 <= nc < len(grid[0]) and grid[nr][nc] != '#' and (nr, nc) not in seen:
+                seen.add((nr, nc))
+                stack.append((nr, nc))
+    return len(seen) == len(open_cells)
+
+def _runs_are_valid(cells, min_length, max_length=None):
+    """
+    Checks that every run of open cells in a single row or column is long enough,
+    and no longer than max_length if given. A run of length 1 is an unchecked cell
+    and is rejected as well.
+    """
+    run = 0
+    for cell in list(cells) + ['#']:
+        if cell == '#':
+            if 0 < run < min_length or (max_length is not None and run > max_length):
+                return False
+            run = 0
+        else:
+            run += 1
+    return True
+
+def _find_long_run(grid, max_length):
+    """
+    Finds a row or column run of open cells longer than max_length.
+
+    :return: List of (row, col) cells of the run, or None.
+    """
+    lines = [[(r, c) for c in range(len(grid[0]))] for r in range(len(grid))]
+    lines += [[(r, c) for r in range(len(grid))] for c in range(len(grid[0]))]
+    for line in lines:
+        run = []
+        for r, c in line:
+            if grid[r][c] == '#':
+                if len(run) > max_length:
+                    return run
+                run = []
+            else:
+                run.append((r, c))
+        if len(run) > max_length:
+            return run
+    return None
+
+def is_valid_pattern(grid, min_length=3, max_length=None):
+    """
+    Checks if a black-square layout is usable: 180-degree symmetric, every across
+    and down entry at least min_length long (and at most max_length), and all open
+    cells connected.
+
+    :param grid: 2D list representing the crossword grid.
+    :param min_length: Integer, the shortest allowed entry.
+    :param max_length: Optional integer, the longest allowed entry.
+    :return: Boolean, True if the layout is valid.
+    """
+    for r, row in enumerate(grid):
+        for c, cell in enumerate(row):
+            sr, sc = symmetric_cell(grid, r, c)
+            if (cell == '#') != (grid[sr][sc] == '#'):
+                return False
+
+    for row in grid:
+        if not _runs_are_valid(row, min_length, max_length):
+            return False
+    for col in range(len(grid[0])):
+        if not _runs_are_valid([row[col] for row in grid], min_length, max_length):
+            return False
+
+    return is_connected(grid)
+
+## FILLABILITY
+
+def letter_position_counts(word_dict, complexity=25):
+    """
+    Counts, for each word length, how many usable words have each letter at each position.
+
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, words must score above this to be counted.
+    :return: Dictionary where keys are word lengths and values are tuples
+             (number of words, list of {letter: count} per position).
+    """
+    counts = {}
+    for length, word_list in word_dict.items():
+        positions = [{} for _ in range(length)]
+        total = 0
+        for word, points in word_list:
+            if points <= complexity:
+                continue
+            total += 1
+            for i, letter in enumerate(word):
+                positions[i][letter] = positions[i].get(letter, 0) + 1
+        counts[length] = (total, positions)
+    return counts
+
+def estimate_fillability(grid, counts):
+    """
+    Estimates how easy a layout is to fill as the log of the expected number of fills.
+
+    Each slot contributes the log of the number of words of its length, and each
+    crossing contributes the log of the chance that two independently drawn words
+    agree on the shared letter, using the per-position letter counts.
+
+    :param grid: 2D list representing the crossword grid.
+    :param counts: Letter counts as returned by letter_position_counts.
+    :return: Float, higher is easier; -inf if some slot has no candidates at all.
+    """
+    slots = get_slots(grid)
+    score = 0.0
+    cell_owner = {}
+
+    for direction, row, col, length in slots:
+        total, _ = counts.get(length, (0, None))
+        if total == 0:
+            return -math.inf
+        score += math.log(total)
+        for i in range(length):
+            cell = (row, col + i) if direction == "Across" else (row + i, col)
+            cell_owner.setdefault(cell, []).append((length, i))
+
+    for owners in cell_owner.values():
+        if len(owners) != 2:
+            continue
+        (len_a, pos_a), (len_b, pos_b) = owners
+        total_a, positions_a = counts[len_a]
+        total_b, positions_b = counts[len_b]
+        letters_b = positions_b[pos_b]
+        match = sum(n * letters_b.get(letter, 0) for letter, n in positions_a[pos_a].items())
+        if match == 0:
+            return -math.inf
+        score += math.log(match / (total_a * total_b))
+
+    return score
+
+## GENERATOR
+
+def _random_layout(rows, cols, num_black, min_length, rng, max_length=None):
+    """
+    Adds symmetric pairs of black squares in random order, keeping the layout valid
+    after every step, until the budget is used up. With max_length, runs that are
+    too long are broken up first, so large grids stay within the word list's lengths.
+
+    :return: 2D list representing the grid, or None if the budget could not be met.
+    """
+    grid = [['.' for _ in range(cols)] for _ in range(rows)]
+    placed = 0
+
+    def try_place(row, col):
+        sym_row, sym_col = rows - row - 1, cols - col - 1
+        cost = 1 if (row, col) == (sym_row, sym_col) else 2
+        if grid[row][col] == '#' or placed + cost > num_black:
+            return 0
+        grid[row][col] = '#'
+        grid[sym_row][sym_col] = '#'
+        lines = [grid[row], grid[sym_row],
+                 [r[col] for r in grid], [r[sym_col] for r in grid]]
+        if all(_runs_are_valid(line, min_length) for line in lines) and is_connected(grid):
+            return cost
+        grid[row][col] = '.'
+        grid[sym_row][sym_col] = '.'
+        return 0
+
+    if max_length is not None:
+        while True:
+            run = _find_long_run(grid, max_length)
+            if run is None:
+                break
+            cells = run[min_length:len(run) - min_length]
+            rng.shuffle(cells)
+            for row, col in cells:
+                cost = try_place(row, col)
+                if cost:
+                    placed += cost
+                    break
+            else:
+                return None
+
+    cells = [(r, c) for r in range(rows) for c in range(cols)
+             if (r, c) <= (rows - r - 1, cols - c - 1)]
+    rng.shuffle(cells)
+    for row, col in cells:
+        if placed == num_black:
+            break
+        placed += try_place(row, col)
+
+    return grid if placed == num_black else None
+
+def generate_patterns(rows, cols, num_black, word_dict, count=10, complexity=25,
+                      min_length=3, max_attempts=500, rng=None, max_length=None):
+    """
+    Generates distinct 180-degree symmetric layouts and ranks them by estimated fillability.
+
+    :param rows: Integer, number of rows in the grid.
+    :param cols: Integer, number of columns in the grid.
+    :param num_black: Integer, exact number of black squares in each layout.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param count: Integer, the number of layouts to return.
+    :param complexity: Integer, the score threshold the fill will use.
+    :param min_length: Integer, the shortest allowed entry.
+    :param max_attempts: Integer, how many random layouts to try before giving up.
+    :param rng: Optional random.Random instance for reproducible layouts.
+    :param max_length: Optional integer, the longest allowed entry; defaults to the
+                       longest word length in word_dict when the grid is wider than that.
+    :return: List of tuples (fillability, grid), best first.
+    """
+    if num_black % 2 and not (rows % 2 and cols % 2):
+        raise ValueError("An odd number of black squares needs a grid with a center cell")
+
+    rng = rng or random.Random()
+    if max_length is None and max(rows, cols) > max(word_dict, default=0):
+        max_length = max(word_dict, default=0)
+    counts = letter_position_counts(word_dict, complexity)
+    seen = set()
+    ranked = []
+
+    for _ in range(max_attempts):
+        grid = _random_layout(rows, cols, num_black, min_length, rng, max_length)
+        if grid is None:
+            continue
+        key = ''.join(''.join(row) for row in grid)
+        if key in seen:
+            continue
+        seen.add(key)
+        ranked.append((estimate_fillability(grid, counts), grid))
+        if len(ranked) >= count:
+            break
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked
+
+
+if __name__ == '__main__':
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    for fillability, grid in generate_patterns(15, 15, 36, word_dict, count=5):
+        print(f"Estimated fillability: {fillability:.1f}")
+        print_grid(grid)
+        print()
@@ -0,0 +1,120 @@
+# pipeline.py
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from demo import build_word_dictionary, create_clues, create_symmetrical_grid2, print_and_store_word_lists, print_grid
+from fill_engine import build_pattern_index, fill_grid_constrained
+
+
+## FILL STAGE
+
+# Per-process dictionary and index, loaded once by the pool initializer.
+_fill_state = {}
+
+def _init_fill_worker(dict_path, complexity):
+    word_dict = build_word_dictionary(dict_path)
+    _fill_state["word_dict"] = word_dict
+    _fill_state["index"] = build_pattern_index(word_dict, complexity)
+    _fill_state["complexity"] = complexity
+
+def _fill_layout(layout, time_limit, seed):
+    """
+    Fills one layout inside a worker process.
+
+    :param layout: Tuple (rows, cols, black_squares) as passed to create_symmetrical_grid2.
+    :return: Tuple (grid, filled, seconds).
+    """
+    start = time.time()
+    rows, cols, black_squares = layout
+    grid = create_symmetrical_grid2(rows, cols, black_squares)
+    rng = random.Random(seed) if seed is not None else None
+    grid, filled = fill_grid_constrained(grid, _fill_state["word_dict"], _fill_state["complexity"],
+                                         index=_fill_state["index"], rng=rng, time_limit=time_limit)
+    return grid, filled, time.time() - start
+
+## CLUE STAGE
+
+def _clue_grid(grid, AImodel, clue_fn):
+    start = time.time()
+    numbered_words = print_and_store_word_lists(grid)
+    return numbered_words, clue_fn(numbered_words, AImodel), time.time() - start
+
+## PIPELINE
+
+def run_batch(layouts, dict_path, complexity=35, AImodel="gpt-3.5-turbo", fill_workers=None,
+              clue_workers=4, time_limit=60, seed=None, clue_fn=create_clues):
+    """
+    Fills and clues a batch of layouts with the two stages overlapping.
+
+    Fills run in a process pool whose workers each load the dictionary once. As soon
+    as a grid is filled it is handed to a thread pool that writes its clues, while
+    the remaining grids are still being filled, so the batch takes roughly as long
+    as the slower stage rather than the sum of both. A fill or clue call that raises
+    only fails its own layout: the error is stored in its result and the rest of the
+    batch carries on.
+
+    :param layouts: List of tuples (rows, cols, black_squares).
+    :param dict_path: Path to the word list file.
+    :param complexity: Integer, words must score above this to be used.
+    :param AImodel: String, the model passed to clue_fn.
+    :param fill_workers: Optional number of fill processes (defaults to the CPU count).
+    :param clue_workers: Integer, the number of clue requests in flight at once.
+    :param time_limit: Number of seconds each fill may take.
+    :param seed: Optional integer; layout i is filled with seed + i for reproducible batches.
+    :param clue_fn: Function (numbered_words, AImodel) -> clues, create_clues by default.
+    :return: Tuple (results, stats). results[i] is a dictionary with grid, filled,
+             numbered_words, clues, fill_seconds, clue_seconds and error (None, or the
+             exception that stopped the layout as "Type: message") for layouts[i].
+             stats holds the batch wall time and the summed fill and clue times.
+    """
+    start = time.time()
+    results = [{"grid": None, "filled": False, "numbered_words": None, "clues": None,
+                "fill_seconds": 0.0, "clue_seconds": 0.0, "error": None} for _ in layouts]
+
+    with ProcessPoolExecutor(fill_workers, initializer=_init_fill_worker,
+                             initargs=(dict_path, complexity)) as fill_pool, \
+            ThreadPoolExecutor(clue_workers) as clue_pool:
+        fill_futures = {}
+        for i, layout in enumerate(layouts):
+            layout_seed = None if seed is None else seed + i
+            fill_futures[fill_pool.submit(_fill_layout, layout, time_limit, layout_seed)] = i
+
+        clue_futures = {}
+        for future in as_completed(fill_futures):
+            i = fill_futures[future]
+            try:
+                grid, filled, seconds = future.result()
+            except Exception as error:
+                results[i]["error"] = f"{type(error).__name__}: {error}"
+                continue
+            results[i].update(grid=grid, filled=filled, fill_seconds=seconds)
+            if filled:
+                clue_futures[clue_pool.submit(_clue_grid, grid, AImodel, clue_fn)] = i
+
+        for future in as_completed(clue_futures):
+            i = clue_futures[future]
+            try:
+                numbered_words, clues, seconds = future.result()
+            except Exception as error:
+                results[i]["error"] = f"{type(error).__name__}: {error}"
+                continue
+            results[i].update(numbered_words=numbered_words, clues=clues, clue_seconds=seconds)
+
+    stats = {
+        "wall_seconds": time.time() - start,
+        "fill_seconds": sum(result["fill_seconds"] for result in results),
+        "clue_seconds": sum(result["clue_seconds"] for result in results),
+    }
+    return results, stats
+
+
+if __name__ == '__main__':
+    layouts = [(5, 7, [(0, 3)]), (4, 4, []), (5, 5, []), (5, 7, [(0, 3)])]
+    results, stats = run_batch(layouts, 'spreadthewordlist_caps.dict', 35, seed=0)
+    for result in results:
+        print_grid(result["grid"])
+        print()
+    print('Batch time:', stats["wall_seconds"], 'seconds')
+    print('Fill time (sum):', stats["fill_seconds"], 'seconds')
+    print('Clue time (sum):', stats["clue_seconds"], 'seconds')
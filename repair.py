@@ -0,0 +1,99 @@
+# repair.py
+from demo import print_grid, build_word_dictionary, create_symmetrical_grid2
+from fill_engine import build_pattern_index, build_slot_map, fill_grid_constrained, iter_fills, read_slot
+
+
+def clear_region(grid, cells=(), slots=()):
+    """
+    Returns a copy of the grid with the given cells and slots emptied.
+
+    :param grid: 2D list representing a filled crossword grid; it is not modified.
+    :param cells: Iterable of (row, col) cells to clear.
+    :param slots: Iterable of (direction, row, col) slot starts to clear entirely.
+    :return: 2D list representing the cleared grid.
+    """
+    cleared = [row[:] for row in grid]
+    for row, col in cells:
+        if cleared[row][col] != '#':
+            cleared[row][col] = '.'
+
+    slot_list, slot_cells, _ = build_slot_map(grid)
+    slot_starts = {(direction, row, col): i for i, (direction, row, col, _) in enumerate(slot_list)}
+    for slot in slots:
+        if tuple(slot) not in slot_starts:
+            raise ValueError(f"No slot starts at {slot}")
+        for row, col in slot_cells[slot_starts[tuple(slot)]]:
+            cleared[row][col] = '.'
+    return cleared
+
+def repair_region(grid, word_dict, cells=(), slots=(), complexity=25, alternatives=5,
+                  index=None, time_limit=1.0, max_fills=200):
+    """
+    Refills only part of a filled grid and returns the best alternatives.
+
+    Everything outside the cleared cells stays fixed, so the only slots searched are
+    the ones that lost a letter; every other entry acts as a constraint and is kept
+    out of the new words. Fills are collected best-scoring words first until
+    max_fills or time_limit is reached, then ranked by the total score of the
+    refilled entries. The original fill itself is never returned.
+
+    :param grid: 2D list representing a filled crossword grid; it is not modified.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param cells: Iterable of (row, col) cells to clear.
+    :param slots: Iterable of (direction, row, col) slot starts to clear entirely.
+    :param complexity: Integer, words must score above this to be used.
+    :param alternatives: Integer, the number of repaired grids to return.
+    :param index: Optional pattern index from build_pattern_index, reused across calls.
+    :param time_limit: Number of seconds to spend searching.
+    :param max_fills: Integer, stop after this many distinct fills have been found.
+    :return: List of tuples (score, grid), best first.
+    """
+    if index is None:
+        index = build_pattern_index(word_dict, complexity)
+    cleared = clear_region(grid, cells, slots)
+    _, slot_cells, _ = build_slot_map(cleared)
+    affected = [cells_ for cells_ in slot_cells if '.' in read_slot(cleared, cells_)]
+
+    scores = {}
+    for length in {len(cells_) for cells_ in affected}:
+        entry = index.get(length)
+        if entry:
+            scores.update(zip(entry["words"], entry["scores"]))
+
+    ranked = []
+    for fill in iter_fills(cleared, word_dict, complexity, index=index, order="score",
+                           time_limit=time_limit):
+        if fill == grid:
+            continue
+        score = sum(scores.get(read_slot(fill, cells_), 0) for cells_ in affected)
+        ranked.append((score, fill))
+        if len(ranked) >= max_fills:
+            break
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked[:alternatives]
+
+
+if __name__ == '__main__':
+    import random
+
+    from bench_fill import LAYOUTS
+
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    index = build_pattern_index(word_dict, 35)
+    # Fill a real layout first, restarting a slow seed, then refill its bottom-right corner.
+    rows, cols, black_squares = LAYOUTS["wednesday 15x15"]
+    filled = False
+    seed = 0
+    while not filled:
+        crossword_grid, filled = fill_grid_constrained(create_symmetrical_grid2(rows, cols, black_squares),
+                                                       word_dict, 35, index=index, rng=random.Random(seed),
+                                                       time_limit=5)
+        seed += 1
+    print_grid(crossword_grid)
+    print()
+    corner = [(row, col) for row in range(12, 15) for col in range(11, 15)]
+    for score, repaired in repair_region(crossword_grid, word_dict, cells=corner, complexity=35, index=index):
+        print(score)
+        print_grid(repaired)
+        print()
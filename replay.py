@@ -0,0 +1,187 @@
+# replay.py
+import argparse
+import cProfile
+import pstats
+import random
+import threading
+import time
+from array import array
+
+from checkpoint import index_fingerprint, read_checkpoint, write_checkpoint
+from demo import build_word_dictionary, create_symmetrical_grid2
+from fill_engine import build_pattern_index, iter_fills
+
+
+# Event codes in the log, one (code, slot, word id) triple per engine event.
+EVENT_CODES = {"place": 0, "undo": 1, "backtrack": 2}
+EVENT_NAMES = {code: kind for kind, code in EVENT_CODES.items()}
+
+
+class ReplayLog:
+    """
+    Compact record of a fill's decisions and backtracks: each event is three
+    integers in an array, with words stored once in a table. Together with the
+    seed, layout and word-list fingerprint it is enough to rerun the same search
+    event for event.
+    """
+
+    def __init__(self, max_events=None):
+        self.max_events = max_events
+        self.events = array('i')
+        self.words = []
+        self.word_ids = {}
+        self.truncated = False
+
+    def __len__(self):
+        return len(self.events) // 3
+
+    def on_event(self, kind, slot, word, changes):
+        if self.max_events is not None and len(self) >= self.max_events:
+            self.truncated = True
+            return
+        word_id = -1
+        if word is not None:
+            word_id = self.word_ids.get(word)
+            if word_id is None:
+                word_id = self.word_ids[word] = len(self.words)
+                self.words.append(word)
+        self.events.extend((EVENT_CODES[kind], slot, word_id))
+
+    def event(self, i):
+        """
+        Returns event i as (kind, slot, word).
+        """
+        code, slot, word_id = self.events[3 * i:3 * i + 3]
+        return EVENT_NAMES[code], slot, self.words[word_id] if word_id >= 0 else None
+
+## RECORD
+
+def record_fill(grid, word_dict, complexity=25, seed=0, index=None, order="random", time_limit=None,
+                max_events=None):
+    """
+    Fills a grid with an explicitly seeded search while logging every decision.
+
+    :param grid: 2D list representing the crossword grid; it is not modified.
+    :param seed: Integer, the seed of the search's random.Random.
+    :param max_events: Optional cap on the logged events (the fill itself is not capped).
+    :return: Tuple (fill or None, state) where state is the replay log as a dictionary for save_log.
+    """
+    if index is None:
+        index = build_pattern_index(word_dict, complexity)
+    log = ReplayLog(max_events)
+    stats = {}
+    start = time.time()
+    fill = next(iter_fills(grid, word_dict, complexity, index=index, rng=random.Random(seed), order=order,
+                           time_limit=time_limit, stats=stats, on_event=log.on_event), None)
+    state = {
+        "grid": [''.join(row) for row in grid],
+        "complexity": complexity,
+        "order": order,
+        "seed": seed,
+        "fingerprint": index_fingerprint(index),
+        "filled": fill is not None,
+        "seconds": time.time() - start,
+        "stats": stats,
+        "words": log.words,
+        "events": log.events.tobytes(),
+        "truncated": log.truncated,
+        "count": len(log),
+    }
+    return fill, state
+
+def save_log(path, state):
+    """
+    Writes a replay log compressed to disk.
+
+    :return: Integer size in bytes.
+    """
+    return write_checkpoint(path, state)
+
+def load_log(path):
+    """
+    Reads a replay log written by save_log.
+
+    :return: Tuple (state, ReplayLog).
+    """
+    state = read_checkpoint(path)
+    log = ReplayLog()
+    log.events.frombytes(state["events"])
+    log.words = state["words"]
+    log.word_ids = {word: i for i, word in enumerate(log.words)}
+    return state, log
+
+## REPLAY
+
+def replay(path, word_dict, index=None, verify=True, profile_path=None):
+    """
+    Reruns a logged fill with the same seed, checking each event against the log,
+    and stops once the logged events are used up (a logged run cut short by its
+    time limit is replayed up to the same point, however long that takes now). The
+    engine checks stop at the same place it checks its time limit, so the replay
+    ends exactly where the logged run did and its stats match the logged ones.
+
+    :param path: Path of the replay log.
+    :param word_dict: Dictionary of words organized by length; must match the logged fill.
+    :param index: Optional pattern index built with the log's complexity.
+    :param verify: Boolean, raise ValueError at the first event that differs from the log.
+    :param profile_path: Optional path to write cProfile stats of the replayed search to.
+    :return: Dictionary with events, seconds, filled and the engine stats of the replay.
+    """
+    state, log = load_log(path)
+    if index is None:
+        index = build_pattern_index(word_dict, state["complexity"])
+    if index_fingerprint(index) != state["fingerprint"]:
+        raise ValueError("Replay log was recorded with a different word list or complexity")
+
+    total = len(log)
+    seen = [0]
+    stop = threading.Event()
+
+    def check(kind, slot, word, changes):
+        i = seen[0]
+        seen[0] += 1
+        if i >= total:
+            stop.set()
+            return
+        if verify and (kind, slot, word) != log.event(i):
+            raise ValueError(f"Replay diverged at event {i}: logged {log.event(i)}, got {(kind, slot, word)}")
+        # A logged run that filled ends by yielding its fill, one that timed out by stopping.
+        if i + 1 == total and not state["truncated"] and not state["filled"]:
+            stop.set()
+
+    stats = {}
+    profiler = cProfile.Profile() if profile_path else None
+    start = time.time()
+    if profiler is not None:
+        profiler.enable()
+    fill = next(iter_fills(state["grid"], word_dict, state["complexity"], index=index,
+                           rng=random.Random(state["seed"]), order=state["order"], stats=stats,
+                           stop=stop, on_event=check), None)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+    return {"events": min(seen[0], total), "seconds": time.time() - start, "filled": fill is not None,
+            "stats": stats}
+
+
+if __name__ == '__main__':
+    from bench_fill import LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Replay a logged fill, optionally under cProfile")
+    parser.add_argument("log", nargs="?", help="replay log to replay; omitted to record a demo log first")
+    parser.add_argument("--dict", default="spreadthewordlist_caps.dict")
+    parser.add_argument("--profile", help="write cProfile stats to this path and print the top entries")
+    args = parser.parse_args()
+
+    word_dict = build_word_dictionary(args.dict)
+    path = args.log
+    if path is None:
+        path = "fill_replay.log"
+        fill, state = record_fill(create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"]), word_dict, 35, seed=7)
+        size = save_log(path, state)
+        print(f"Recorded {state['count']} events in {state['seconds']:.2f} seconds ({size} bytes)")
+
+    result = replay(path, word_dict, profile_path=args.profile)
+    print(f"Replayed {result['events']} events in {result['seconds']:.2f} seconds, filled={result['filled']}")
+    if args.profile:
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(20)
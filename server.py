@@ -0,0 +1,445 @@
+# server.py
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from checkpoint import index_fingerprint
+from demo import create_clues, create_symmetrical_grid2, print_and_store_word_lists
+from fill_cache import FillCache
+from fill_engine import build_pattern_index, fill_grid_constrained, iter_fills
+from themes import place_theme_entries
+from wordlist_reload import WordListRegistry, WordListWatcher
+
+
+## FILL PROCESSES
+
+# The service as forked into each fill process, with the word list version each registry matches.
+_fill_state = {}
+
+def _init_fill_worker(service):
+    _fill_state["service"] = service
+    _fill_state["versions"] = {path: registry.current()["version"] for path, registry in service.registries.items()}
+
+def _worker_index(dict_path, version, complexity):
+    """
+    Returns (word_dict, pattern index) inside a fill process. The word lists came over
+    with the fork; when the server has reloaded one since, the process reloads its own
+    copy first.
+    """
+    service = _fill_state["service"]
+    if _fill_state["versions"][dict_path] != version:
+        service.registries[dict_path].reload()
+        _fill_state["versions"][dict_path] = version
+    return service.get_index(dict_path, complexity)
+
+def _fill_in_worker(dict_path, version, complexity, grid, seed, time_limit):
+    """
+    Fills one grid inside a fill process.
+    """
+    word_dict, index = _worker_index(dict_path, version, complexity)
+    return fill_grid_constrained(grid, word_dict, complexity, index=index, rng=random.Random(seed),
+                                 time_limit=time_limit)
+
+def _backfill_in_worker(dict_path, version, complexity, rows, seed, time_limit):
+    """
+    Fills an empty layout for the cache inside a fill process, giving up as soon as
+    the server sets backfill_stop because a job arrived.
+
+    :return: The fill as a 2D list, or None.
+    """
+    word_dict, index = _worker_index(dict_path, version, complexity)
+    return next(iter_fills([list(row) for row in rows], word_dict, complexity, index=index,
+                           rng=random.Random(seed), time_limit=time_limit,
+                           stop=_fill_state["service"].backfill_stop), None)
+
+## JOBS
+
+def run_fill_job(service, payload):
+    """
+    Fills a grid described by rows, cols and black_squares (plus optional theme entries).
+    A seed is drawn when the payload has none and returned, so any fill can be reproduced.
+    With a fill cache, unseeded requests for an empty layout are answered with a cached
+    fill not served before when there is one, and fresh fills are added to the cache.
+    A cached fill made for the transposed layout comes back with seed None, since its
+    seed would fill this layout differently.
+    """
+    dict_path = payload.get("dict", service.default_dict)
+    complexity = payload.get("complexity", 35)
+    if dict_path not in service.registries:
+        raise ValueError(f"Dictionary {dict_path} is not loaded")
+    grid = create_symmetrical_grid2(payload["rows"], payload["cols"],
+                                    [tuple(cell) for cell in payload.get("black_squares", [])])
+    if payload.get("theme"):
+        place_theme_entries(grid, [tuple(entry) for entry in payload["theme"]])
+    cache = service.fill_cache
+    if cache is not None:
+        dictionary = service.get_fingerprint(dict_path, complexity)
+        service.note_layout(dict_path, complexity, grid)
+        if "seed" not in payload:
+            cached = cache.take(grid, dictionary, complexity)
+            if cached is not None:
+                return {"grid": cached[0], "filled": True, "seed": cached[1], "cached": True}
+    seed = payload["seed"] if "seed" in payload else random.randrange(2 ** 32)
+    grid, filled = service.fill(dict_path, complexity, grid, seed, payload.get("time_limit", 60))
+    if cache is not None and filled and not payload.get("theme"):
+        cache.put(grid, dictionary, complexity, seed, served=True)
+    return {"grid": [''.join(row) for row in grid], "filled": filled, "seed": seed}
+
+def run_clue_job(service, payload):
+    """
+    Writes clues for every entry of a filled grid given as a list of row strings.
+    """
+    numbered_words = print_and_store_word_lists([list(row) for row in payload["grid"]])
+    clues = create_clues(numbered_words, payload.get("model", "gpt-3.5-turbo"))
+    return {category: {str(num): {"answer": word, "clue": clue} for num, (word, clue) in entries.items()}
+            for category, entries in clues.items()}
+
+def run_export_job(service, payload):
+    """
+    Packs a filled grid and optional clues into a numbered puzzle document.
+    """
+    numbered_words = print_and_store_word_lists([list(row) for row in payload["grid"]])
+    clues = payload.get("clues", {})
+    puzzle = {"grid": payload["grid"], "Across": [], "Down": []}
+    for category in ["Across", "Down"]:
+        for num, (row, col, word) in sorted(numbered_words[category].items()):
+            clue = clues.get(category, {}).get(str(num), {}).get("clue", "")
+            puzzle[category].append({"number": num, "row": row, "col": col, "answer": word, "clue": clue})
+    return puzzle
+
+JOB_TYPES = {
+    "fill": run_fill_job,
+    "clue": run_clue_job,
+    "export": run_export_job,
+}
+
+def latency_summary(samples):
+    """
+    Summarizes a list of latencies in seconds.
+
+    :return: Dictionary with count, mean, p50, p95 and max.
+    """
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+## SERVICE
+
+class PuzzleService:
+    """
+    Keeps dictionaries and pattern indexes warm and runs jobs from a bounded queue
+    on a pool of worker threads. submit() refuses new jobs while the queue is full.
+
+    Fills are CPU-bound and would hold the GIL, so a worker thread hands each one to a
+    pool of fill processes and waits; clue and export jobs, which mostly wait on the
+    network, run on the threads. The fill processes are forked once the word lists
+    and indexes are loaded and before any thread starts, so they share that memory
+    copy-on-write instead of loading their own.
+    With a fill_cache, the layouts of recent fill jobs are remembered so backfill()
+    can top up their cached fills while no job is queued or running.
+    """
+
+    def __init__(self, dict_paths, workers=4, queue_size=32, history=1000, latency_window=1000,
+                 complexities=(35,), fill_cache=None, recent_layouts=16, fill_workers=None):
+        self.default_dict = dict_paths[0]
+        self.registries = {path: WordListRegistry(path, complexities) for path in dict_paths}
+        self.indexes = {}
+        self.index_lock = threading.Lock()
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.results = OrderedDict()
+        self.results_lock = threading.Lock()
+        self.history = history
+        self.latencies = {job_type: [] for job_type in JOB_TYPES}
+        self.latency_window = latency_window
+        self.job_ids = itertools.count(1)
+        self.rejected = 0
+        self.fill_cache = fill_cache
+        self.fingerprints = {}
+        self.recent_layouts = OrderedDict()
+        self.max_recent_layouts = recent_layouts
+        self.active = 0
+        self.fill_workers = fill_workers or os.cpu_count()
+        self.backfill_stop = multiprocessing.get_context("fork").Event()
+        self.fill_pool = ProcessPoolExecutor(self.fill_workers, mp_context=multiprocessing.get_context("fork"),
+                                             initializer=_init_fill_worker, initargs=(self,))
+        # A fork pool starts all its processes on the first submit, so this forks them now.
+        self.fill_pool.submit(int).result()
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def get_index(self, dict_path, complexity):
+        """
+        Returns (word_dict, pattern index) from the current snapshot of a loaded dictionary.
+        Indexes for complexities that were not preloaded are built once per word list version.
+        """
+        if dict_path not in self.registries:
+            raise ValueError(f"Dictionary {dict_path} is not loaded")
+        snapshot = self.registries[dict_path].current()
+        index = snapshot["indexes"].get(complexity)
+        if index is None:
+            with self.index_lock:
+                key = (dict_path, snapshot["version"], complexity)
+                if key not in self.indexes:
+                    self.indexes[key] = build_pattern_index(snapshot["word_dict"], complexity)
+                index = self.indexes[key]
+        return snapshot["word_dict"], index
+
+    def fill(self, dict_path, complexity, grid, seed, time_limit):
+        """
+        Fills a grid in a fill process with the word list version current now.
+
+        :return: Tuple (grid, filled) as from fill_grid_constrained.
+        """
+        version = self.registries[dict_path].current()["version"]
+        return self.fill_pool.submit(_fill_in_worker, dict_path, version, complexity, grid, seed,
+                                     time_limit).result()
+
+    def get_fingerprint(self, dict_path, complexity):
+        """
+        Returns the fingerprint of a word list's index at a complexity, hashed once per word list version.
+        """
+        key = (dict_path, self.registries[dict_path].current()["version"], complexity)
+        fingerprint = self.fingerprints.get(key)
+        if fingerprint is None:
+            fingerprint = self.fingerprints[key] = index_fingerprint(self.get_index(dict_path, complexity)[1])
+        return fingerprint
+
+    def note_layout(self, dict_path, complexity, grid):
+        """
+        Remembers the layout of a fill job as a backfill candidate, most recent last.
+        """
+        key = (dict_path, complexity, tuple(''.join('#' if cell == '#' else '.' for cell in row) for row in grid))
+        with self.results_lock:
+            self.recent_layouts.pop(key, None)
+            self.recent_layouts[key] = True
+            while len(self.recent_layouts) > self.max_recent_layouts:
+                self.recent_layouts.popitem(last=False)
+
+    def backfill(self, target=5, interval=1.0, time_limit=30.0):
+        """
+        Runs forever on its own thread: whenever the service is idle, fills one more
+        grid for the recent layout with the fewest unserved cached fills below target.
+        The fill runs in the fill pool like any other and is abandoned as soon as a
+        job is submitted, so backfilling never holds up real work for long.
+        """
+        rng = random.Random()
+        while True:
+            time.sleep(interval)
+            # Cleared before the idle check, so a job submitted after it always stops the fill.
+            self.backfill_stop.clear()
+            with self.results_lock:
+                idle = self.active == 0 and self.jobs.empty()
+                layouts = list(self.recent_layouts)
+            if not idle:
+                continue
+            needed = []
+            for dict_path, complexity, rows in layouts:
+                unserved = self.fill_cache.count(rows, self.get_fingerprint(dict_path, complexity), complexity,
+                                                 served=False)
+                if unserved < target:
+                    needed.append((unserved, dict_path, complexity, rows))
+            if needed:
+                unserved, dict_path, complexity, rows = min(needed)
+                version = self.registries[dict_path].current()["version"]
+                dictionary = self.get_fingerprint(dict_path, complexity)
+                seed = rng.randrange(2 ** 32)
+                fill = self.fill_pool.submit(_backfill_in_worker, dict_path, version, complexity, rows, seed,
+                                             time_limit).result()
+                if fill is not None:
+                    self.fill_cache.put(fill, dictionary, complexity, seed)
+
+    def start_backfill(self, target=5, interval=1.0, time_limit=30.0):
+        thread = threading.Thread(target=self.backfill, args=(target, interval, time_limit), daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, interval=1.0):
+        """
+        Reloads each dictionary incrementally whenever its file changes.
+        Jobs already running keep the word list they started with.
+        """
+        def report(snapshot, diff):
+            print(f"Reloaded word list version {snapshot['version']}: {len(diff['inserted'])} inserted, "
+                  f"{len(diff['deleted'])} deleted, {len(diff['rescored'])} rescored")
+        return [WordListWatcher(registry, interval, report).start() for registry in self.registries.values()]
+
+    def submit(self, job_type, payload):
+        """
+        Queues a job without blocking.
+
+        :return: Integer job id, or None if the queue is saturated.
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type {job_type!r}")
+        job_id = next(self.job_ids)
+        job = {"id": job_id, "type": job_type, "status": "queued", "submitted": time.monotonic()}
+        with self.results_lock:
+            self.results[job_id] = job
+            while len(self.results) > self.history:
+                self.results.popitem(last=False)
+        try:
+            self.jobs.put_nowait((job, payload))
+        except queue.Full:
+            with self.results_lock:
+                self.results.pop(job_id, None)
+                self.rejected += 1
+            return None
+        self.backfill_stop.set()
+        return job_id
+
+    def worker(self):
+        while True:
+            job, payload = self.jobs.get()
+            with self.results_lock:
+                self.active += 1
+            started = time.monotonic()
+            job["status"] = "running"
+            try:
+                job["result"] = JOB_TYPES[job["type"]](self, payload)
+                job["status"] = "done"
+            except Exception as error:
+                job["error"] = f"{type(error).__name__}: {error}"
+                job["status"] = "failed"
+            finished = time.monotonic()
+            job["queue_seconds"] = started - job["submitted"]
+            job["run_seconds"] = finished - started
+            job["latency_seconds"] = finished - job["submitted"]
+            with self.results_lock:
+                samples = self.latencies[job["type"]]
+                samples.append(job["latency_seconds"])
+                del samples[:-self.latency_window]
+                self.active -= 1
+            self.jobs.task_done()
+
+    def get_job(self, job_id):
+        with self.results_lock:
+            job = self.results.get(job_id)
+            return None if job is None else {k: v for k, v in job.items() if k != "submitted"}
+
+    def stats(self):
+        with self.results_lock:
+            latency = {job_type: latency_summary(samples) for job_type, samples in self.latencies.items()}
+        stats = {
+            "queued": self.jobs.qsize(),
+            "queue_size": self.jobs.maxsize,
+            "workers": len(self.threads),
+            "fill_workers": self.fill_workers,
+            "rejected": self.rejected,
+            "latency": latency,
+        }
+        if self.fill_cache is not None:
+            stats["fill_cache"] = self.fill_cache.stats()
+        return stats
+
+## HTTP
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            job_type = self.path.strip("/")
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                job_id = service.submit(job_type, payload)
+            except ValueError as error:
+                self.send_json(400, {"error": str(error)})
+                return
+            if job_id is None:
+                self.send_json(503, {"error": "queue full"}, {"Retry-After": "1"})
+                return
+            self.send_json(202, {"job_id": job_id})
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self.send_json(200, service.stats())
+                return
+            if self.path.startswith("/jobs/"):
+                try:
+                    job = service.get_job(int(self.path[len("/jobs/"):]))
+                except ValueError:
+                    job = None
+                if job is not None:
+                    self.send_json(200, job)
+                    return
+            self.send_json(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(host="127.0.0.1", port=8765, dict_paths=("spreadthewordlist_caps.dict",), workers=4, queue_size=32,
+          watch=False, fill_cache_path=None, backfill=0, fill_workers=None):
+    """
+    Runs the puzzle server until interrupted.
+
+    POST /fill, /clue or /export with a JSON body queues a job and answers 202 with its
+    id, or 503 with Retry-After when the queue is full. GET /jobs/<id> returns the
+    job status, result and its queue, run and total latency; GET /stats returns
+    queue depth and latency percentiles per job type. With watch, edits to the word
+    list files are picked up without a restart. With fill_cache_path, fills are cached
+    in that SQLite file, and with backfill the service keeps up to that many unserved
+    fills of recently requested layouts while idle.
+
+    Jobs run on the worker threads, but fills run in fill_workers processes (the CPU
+    count by default) forked from the loaded server, so concurrent fills use every
+    core. The fork start method makes this POSIX-only.
+    """
+    fill_cache = FillCache(fill_cache_path) if fill_cache_path else None
+    service = PuzzleService(list(dict_paths), workers=workers, queue_size=queue_size, fill_cache=fill_cache,
+                            fill_workers=fill_workers)
+    if watch:
+        service.watch()
+    if fill_cache is not None and backfill:
+        service.start_backfill(backfill)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Resident crossword generation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dict", action="append", dest="dicts")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--fill-workers", type=int, help="fill processes, the CPU count by default")
+    parser.add_argument("--watch", action="store_true", help="reload word lists when their files change")
+    parser.add_argument("--fill-cache", help="SQLite file of cached fills")
+    parser.add_argument("--backfill", type=int, default=0, help="unserved fills to keep per recent layout when idle")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.dicts or ["spreadthewordlist_caps.dict"], args.workers, args.queue_size,
+          args.watch, args.fill_cache, args.backfill, args.fill_workers)
@@ -0,0 +1,183 @@
+# telemetry.py
+import json
+import math
+import threading
+import time
+
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, math.inf)
+
+# USD per 1K tokens as (prompt, completion); update when pricing changes.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+}
+
+
+def request_cost(model, prompt_tokens, completion_tokens, prices=MODEL_PRICES):
+    """
+    Computes the cost of one request from its token counts.
+
+    :return: Float cost in USD, 0.0 for models missing from the price table.
+    """
+    prompt_price, completion_price = prices.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class ClueTelemetry:
+    """
+    Collects per-request metrics from create_clues: latency, retries, token usage and cost.
+    One instance per puzzle gives a per-puzzle summary; sharing one across puzzles
+    aggregates a whole run. Safe to use from several threads.
+    """
+
+    def __init__(self, prices=MODEL_PRICES):
+        self.prices = prices
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def record(self, model, latency, retries=0, prompt_tokens=0, completion_tokens=0, word=None, ok=True,
+               wait=0.0):
+        """
+        Records one clue request as it finishes.
+
+        :param model: String, the model the request went to.
+        :param latency: Float, seconds from the start of the request to the final response,
+                        including backoff sleeps between retries and the rate-limit wait.
+        :param retries: Integer, attempts made after the first one.
+        :param prompt_tokens: Integer, from the response usage field.
+        :param completion_tokens: Integer, from the response usage field.
+        :param word: Optional answer the clue was written for.
+        :param ok: Boolean, False if the request failed after all retries.
+        :param wait: Float, the part of latency spent waiting on the rate limiter.
+        """
+        finished = time.time()
+        with self.lock:
+            self.requests.append({
+                "model": model,
+                "word": word,
+                "started": finished - latency,
+                "finished": finished,
+                "latency": latency,
+                "wait": wait,
+                "retries": retries,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost": request_cost(model, prompt_tokens, completion_tokens, self.prices),
+                "ok": ok,
+            })
+
+    def summary(self):
+        """
+        Aggregates the recorded requests per model.
+
+        :return: Dictionary keyed by model with request, error, retry, token and cost
+                 totals, latency percentiles and a cumulative latency histogram.
+                 requests_per_second is the throughput over the wall-clock span from
+                 the first request's start to the last response, so requests in
+                 flight at once all count.
+        """
+        with self.lock:
+            requests = list(self.requests)
+
+        models = {}
+        for request in requests:
+            models.setdefault(request["model"], []).append(request)
+
+        summary = {}
+        for model, entries in models.items():
+            latencies = sorted(entry["latency"] for entry in entries)
+            total_latency = sum(latencies)
+            span = max(entry["finished"] for entry in entries) - min(entry["started"] for entry in entries)
+            histogram = [[bound, sum(latency <= bound for latency in latencies)] for bound in LATENCY_BUCKETS]
+            summary[model] = {
+                "requests": len(entries),
+                "errors": sum(not entry["ok"] for entry in entries),
+                "retries": sum(entry["retries"] for entry in entries),
+                "prompt_tokens": sum(entry["prompt_tokens"] for entry in entries),
+                "completion_tokens": sum(entry["completion_tokens"] for entry in entries),
+                "cost": sum(entry["cost"] for entry in entries),
+                "latency_total": total_latency,
+                "latency_mean": total_latency / len(entries),
+                "latency_p50": _percentile(latencies, 0.5),
+                "latency_p95": _percentile(latencies, 0.95),
+                "latency_max": latencies[-1],
+                "rate_limit_wait": sum(entry["wait"] for entry in entries),
+                "wall_seconds": span,
+                "requests_per_second": len(entries) / span if span else 0.0,
+                "latency_histogram": histogram,
+            }
+        return summary
+
+    def to_json(self, indent=2):
+        """
+        Exports the summary as JSON; the +Inf bucket bound is written as the string "+Inf".
+        """
+        summary = self.summary()
+        for stats in summary.values():
+            stats["latency_histogram"] = [["+Inf" if math.isinf(bound) else bound, count]
+                                          for bound, count in stats["latency_histogram"]]
+        return json.dumps(summary, indent=indent)
+
+    def to_prometheus(self, prefix="autocross_clue"):
+        """
+        Exports the summary in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# HELP {prefix}_request_seconds Clue request latency including retries.",
+            f"# TYPE {prefix}_request_seconds histogram",
+        ]
+        summary = self.summary()
+        for model, stats in summary.items():
+            for bound, count in stats["latency_histogram"]:
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f'{prefix}_request_seconds_bucket{{model="{model}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_request_seconds_sum{{model="{model}"}} {stats["latency_total"]}')
+            lines.append(f'{prefix}_request_seconds_count{{model="{model}"}} {stats["requests"]}')
+
+        counters = [
+            ("requests_total", "requests", "Clue requests made."),
+            ("errors_total", "errors", "Clue requests that failed after all retries."),
+            ("retries_total", "retries", "Retried clue request attempts."),
+            ("prompt_tokens_total", "prompt_tokens", "Prompt tokens reported by the API."),
+            ("completion_tokens_total", "completion_tokens", "Completion tokens reported by the API."),
+            ("cost_usd_total", "cost", "Estimated clue generation cost in USD."),
+            ("rate_limit_wait_seconds_total", "rate_limit_wait", "Seconds clue requests waited on the rate limiter."),
+        ]
+        for name, key, help_text in counters:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for model, stats in summary.items():
+                lines.append(f'{prefix}_{name}{{model="{model}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self):
+        """
+        Prints a short per-model report in the style of the demos.
+        """
+        for model, stats in self.summary().items():
+            print(f"{model}: {stats['requests']} requests, {stats['retries']} retries, {stats['errors']} errors")
+            print(f"  latency mean {stats['latency_mean']:.2f}s, p50 {stats['latency_p50']:.2f}s, "
+                  f"p95 {stats['latency_p95']:.2f}s, {stats['requests_per_second']:.2f} requests/s")
+            print(f"  tokens {stats['prompt_tokens']} prompt / {stats['completion_tokens']} completion, "
+                  f"cost ${stats['cost']:.4f}")
+
+
+if __name__ == '__main__':
+    from demo import create_clues, print_and_store_word_lists
+
+    crossword_grid = [list(row) for row in ("SEAL", "AFOE", "ITNO", "SSEI")]
+    final_wordlist = print_and_store_word_lists(crossword_grid)
+    telemetry = ClueTelemetry()
+    for model in ["gpt-3.5-turbo", "gpt-4"]:
+        create_clues(final_wordlist, model, telemetry=telemetry, max_retries=2)
+    telemetry.print_summary()
+    print(telemetry.to_prometheus())
@@ -0,0 +1,37 @@
+# test_fill_engine.py
+import random
+
+import pytest
+
+from bench_fill import LAYOUTS
+from demo import build_word_dictionary, create_symmetrical_grid2
+from fill_engine import build_pattern_index, iter_fills, resume_fill
+
+
+@pytest.fixture(scope="module")
+def word_index():
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    return word_dict, build_pattern_index(word_dict, 35)
+
+def recorder(events):
+    return lambda kind, slot, word, changes: events.append((kind, slot, word))
+
+@pytest.mark.parametrize("order", ["random", "crossing"])
+def test_resume_matches_uninterrupted_run(tmp_path, word_index, order):
+    word_dict, index = word_index
+    rows, cols, black_squares = LAYOUTS["sunday 21x21"]
+    path = str(tmp_path / "fill.ckpt")
+
+    expected = []
+    full = next(iter_fills(create_symmetrical_grid2(rows, cols, black_squares), word_dict, 35, index=index,
+                           rng=random.Random(4), order=order, on_event=recorder(expected)), None)
+    assert full is not None
+
+    events = []
+    fill = next(iter_fills(create_symmetrical_grid2(rows, cols, black_squares), word_dict, 35, index=index,
+                           rng=random.Random(4), order=order, time_limit=0.02, checkpoint_path=path,
+                           on_event=recorder(events)), None)
+    if fill is None:
+        fill = next(resume_fill(path, word_dict, index=index, on_event=recorder(events)), None)
+    assert events == expected
+    assert fill == full
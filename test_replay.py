@@ -0,0 +1,27 @@
+# test_replay.py
+import pytest
+
+from bench_fill import LAYOUTS
+from demo import build_word_dictionary, create_symmetrical_grid2
+from fill_engine import build_pattern_index
+from replay import record_fill, replay, save_log
+
+
+@pytest.fixture(scope="module")
+def word_index():
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    return word_dict, build_pattern_index(word_dict, 35)
+
+@pytest.mark.parametrize("time_limit", [0.05, None])
+def test_replay_stops_where_the_log_ends(tmp_path, word_index, time_limit):
+    word_dict, index = word_index
+    rows, cols, black_squares = LAYOUTS["sunday 21x21" if time_limit else "wednesday 15x15"]
+    fill, state = record_fill(create_symmetrical_grid2(rows, cols, black_squares), word_dict, 35, seed=7,
+                              index=index, time_limit=time_limit)
+    path = str(tmp_path / "fill.log")
+    save_log(path, state)
+
+    result = replay(path, word_dict, index=index)
+    assert result["events"] == state["count"]
+    assert result["filled"] == state["filled"]
+    assert result["stats"] == state["stats"]
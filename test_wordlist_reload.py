@@ -0,0 +1,33 @@
+# test_wordlist_reload.py
+import pytest
+
+from anagrams import build_anagram_index
+from wordlist_reload import WordListRegistry
+
+
+def write_word_list(path, scores):
+    path.write_text(''.join(f"{word};{score}\n" for word, score in scores.items()))
+
+@pytest.mark.parametrize("change", [
+    {"SLATE": 50},                   # inserted
+    {"TALES": None},                 # deleted
+    {"LEAST": 60},                   # rescored from below the complexity to above it
+    {"STEAL": 10},                   # rescored from above the complexity to below it
+    {"TALES": 55},                   # rescored above the complexity, reordering the entry
+])
+def test_incremental_anagram_index_matches_rebuild(tmp_path, change):
+    path = tmp_path / "words.dict"
+    scores = {"STEAL": 50, "LEAST": 10, "TALES": 40, "HOOD": 50}
+    write_word_list(path, scores)
+    registry = WordListRegistry(str(path), complexities=(), anagram_complexity=25)
+
+    for word, score in change.items():
+        if score is None:
+            del scores[word]
+        else:
+            scores[word] = score
+    write_word_list(path, scores)
+    assert registry.reload() is not None
+
+    snapshot = registry.current()
+    assert snapshot["anagram_index"] == build_anagram_index(snapshot["word_dict"], 25)
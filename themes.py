@@ -0,0 +1,70 @@
+# themes.py
+import random
+
+from demo import create_symmetrical_grid2, print_grid, build_word_dictionary, print_and_store_word_lists, print_answers
+from fill_engine import fill_grid_constrained
+
+
+def place_theme_entries(grid, entries):
+    """
+    Writes theme entries into the grid and returns the cells they lock.
+
+    Every entry must fill a whole slot, from a black square or the grid edge to the
+    next, so it stays exactly the theme answer once the grid is filled.
+
+    :param grid: 2D list representing the crossword grid; modified in place.
+    :param entries: List of tuples (word, row, col, direction) with 0-based coordinates
+                    and direction 'Across' or 'Down'.
+    :return: Set of (row, col) cells holding theme letters.
+    """
+    locked = set()
+    for word, row, col, direction in entries:
+        if direction not in ("Across", "Down"):
+            raise ValueError(f"Unknown direction {direction!r} for theme entry {word}")
+        dr, dc = (0, 1) if direction == "Across" else (1, 0)
+        for r, c in ((row - dr, col - dc), (row + dr * len(word), col + dc * len(word))):
+            if 0 <= r < len(grid) and 0 <= c < len(grid[0]) and grid[r][c] != '#':
+                raise ValueError(f"Theme entry {word} does not fill its whole slot: ({r}, {c}) is open")
+        for i, letter in enumerate(word.upper()):
+            r, c = (row, col + i) if direction == "Across" else (row + i, col)
+            if not (0 <= r < len(grid) and 0 <= c < len(grid[0])):
+                raise ValueError(f"Theme entry {word} runs off the grid at ({r}, {c})")
+            if grid[r][c] == '#':
+                raise ValueError(f"Theme entry {word} hits a black square at ({r}, {c})")
+            if grid[r][c] not in ('.', letter):
+                raise ValueError(f"Theme entry {word} conflicts with '{grid[r][c]}' at ({r}, {c})")
+            grid[r][c] = letter
+            locked.add((r, c))
+    return locked
+
+def fill_themed_grid(grid, entries, word_dict, complexity=25, index=None, rng=None, time_limit=None):
+    """
+    Places the theme entries, then fills the rest of the grid around them.
+
+    The theme letters never move: the fill engine only writes empty cells, narrows the
+    candidates of every slot crossing a theme entry before it starts searching, and
+    never reuses a theme answer elsewhere in the grid.
+
+    :param grid: 2D list representing the crossword grid; filled in place.
+    :param entries: List of tuples (word, row, col, direction), see place_theme_entries.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param complexity: Integer, words must score above this to be used.
+    :param index: Optional pattern index from build_pattern_index, reused across calls.
+    :param rng: Optional random.Random instance used to shuffle candidates.
+    :param time_limit: Optional number of seconds after which the fill gives up.
+    :return: Tuple (grid, locked, filled) where locked is the set of theme cells.
+    """
+    locked = place_theme_entries(grid, entries)
+    grid, filled = fill_grid_constrained(grid, word_dict, complexity, index=index, rng=rng,
+                                         time_limit=time_limit)
+    return grid, locked, filled
+
+
+if __name__ == '__main__':
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    crossword_grid = create_symmetrical_grid2(5, 7, [(0, 3)])
+    theme = [("PROGRAM", 2, 0, "Across")]
+    final_grid, locked, filled = fill_themed_grid(crossword_grid, theme, word_dict, 35, rng=random.Random(0))
+    print_grid(final_grid)
+    if filled:
+        print_answers(print_and_store_word_lists(final_grid))
@@ -0,0 +1,75 @@
+# top_fills.py
+import heapq
+
+from demo import create_symmetrical_grid2, print_grid, build_word_dictionary
+from fill_engine import best_score, build_pattern_index, build_slot_map, iter_fills, pattern_mask, read_slot
+
+
+def fill_score(grid, index, objective="sum"):
+    """
+    Scores a filled grid from the word scores in the index.
+
+    :param grid: 2D list representing a filled crossword grid.
+    :param index: Pattern index as returned by build_pattern_index.
+    :param objective: 'sum' to add up every entry's score, 'min' to take the weakest entry.
+    :return: Integer score; entries missing from the index are ignored.
+    """
+    scores = []
+    for cells in build_slot_map(grid)[1]:
+        score = best_score(index, len(cells), pattern_mask(index, read_slot(grid, cells)))
+        if score is not None:
+            scores.append(score)
+    if objective == "min":
+        return min(scores, default=0)
+    return sum(scores)
+
+def best_fills(grid, word_dict, k=5, complexity=25, objective="sum", index=None, time_limit=10.0, stats=None):
+    """
+    Searches for the k highest-scoring distinct fills of the grid.
+
+    Candidates are tried best-scoring first and, once k fills are known, any branch
+    whose upper bound cannot beat the weakest of them is cut (branch and bound). The
+    search stops when the space is exhausted or time_limit runs out, so the result is
+    exact only if it finishes in time.
+
+    :param grid: 2D list representing the crossword grid; it is not modified.
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param k: Integer, the number of fills to return.
+    :param complexity: Integer, words must score above this to be used.
+    :param objective: 'sum' or 'min' of the word scores from the .dict file.
+    :param index: Optional pattern index from build_pattern_index, reused across calls.
+    :param time_limit: Number of seconds to spend searching.
+    :param stats: Optional dictionary that receives search counters.
+    :return: List of tuples (score, grid), best first.
+    """
+    if objective not in ("sum", "min"):
+        raise ValueError(f"Unknown objective {objective!r}, expected 'sum' or 'min'")
+    if index is None:
+        index = build_pattern_index(word_dict, complexity)
+
+    # Min-heap of the best k fills so far; the counter keeps grids out of comparisons.
+    heap = []
+    counter = 0
+
+    def floor():
+        return heap[0][0] if len(heap) >= k else None
+
+    for fill in iter_fills(grid, word_dict, complexity, index=index, order="score", time_limit=time_limit,
+                           stats=stats, objective=objective, floor=floor):
+        counter += 1
+        item = (fill_score(fill, index, objective), counter, fill)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    return [(score, fill) for score, _, fill in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+
+if __name__ == '__main__':
+    word_dict = build_word_dictionary('spreadthewordlist_caps.dict')
+    crossword_grid = create_symmetrical_grid2(5, 7, [(0, 3)])
+    for score, fill in best_fills(crossword_grid, word_dict, k=3, complexity=35, time_limit=5.0):
+        print(score)
+        print_grid(fill)
+        print()
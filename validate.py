@@ -0,0 +1,144 @@
+# validate.py
+import argparse
+import json
+import random
+import time
+
+from demo import build_word_dictionary, create_symmetrical_grid2
+from fill_engine import build_pattern_index, iter_fills
+from wordlist_reload import read_word_scores
+
+
+## ENTRIES
+
+def build_word_scores(word_dict):
+    """
+    Flattens a word dictionary into a hashed word -> score lookup, keeping each word's best score.
+
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :return: Dictionary {word: score}.
+    """
+    scores = {}
+    for word_list in word_dict.values():
+        for word, points in word_list:
+            if points > scores.get(word, -1):
+                scores[word] = points
+    return scores
+
+def grid_entries(grid, min_length=2):
+    """
+    Extracts every across and down entry by splitting the rows and the transposed
+    rows on black squares, without walking the grid cell by cell.
+
+    :param grid: 2D list or list of row strings.
+    :param min_length: Integer, shorter runs (unchecked cells) are not entries.
+    :return: Tuple (across, down) of lists of entry strings, '.' for empty cells.
+    """
+    rows = [''.join(row) for row in grid]
+    across = [run for row in rows for run in row.split('#') if len(run) >= min_length]
+    down = [run for column in zip(*rows) for run in ''.join(column).split('#') if len(run) >= min_length]
+    return across, down
+
+## VALIDATION
+
+def validate_grid(grid, word_scores, complexity=25, min_length=2):
+    """
+    Checks that a filled grid is a legal puzzle: every entry complete, in the word
+    list, scoring above the complexity threshold and used only once.
+
+    :param grid: 2D list or list of row strings.
+    :param word_scores: Dictionary {word: score}, e.g. from build_word_scores.
+    :param complexity: Integer, entries must score above this.
+    :param min_length: Integer, the shortest run that counts as an entry.
+    :return: Dictionary with valid (Boolean), entries (count) and the lists unfilled,
+             unknown, low_score and duplicates.
+    """
+    across, down = grid_entries(grid, min_length)
+    entries = across + down
+    unfilled = []
+    unknown = []
+    low_score = []
+    duplicates = []
+    seen = set()
+    for entry in entries:
+        if '.' in entry:
+            unfilled.append(entry)
+            continue
+        if entry in seen:
+            duplicates.append(entry)
+        seen.add(entry)
+        score = word_scores.get(entry)
+        if score is None:
+            unknown.append(entry)
+        elif score <= complexity:
+            low_score.append(entry)
+    return {
+        "valid": not (unfilled or unknown or low_score or duplicates),
+        "entries": len(entries),
+        "unfilled": unfilled,
+        "unknown": unknown,
+        "low_score": low_score,
+        "duplicates": duplicates,
+    }
+
+def validate_archive(grids, word_scores, complexity=25, min_length=2):
+    """
+    Validates many grids and summarizes the problems found.
+
+    :param grids: Iterable of grids (2D lists or lists of row strings).
+    :return: Tuple (results, summary). results[i] is the validate_grid report of grid i;
+             summary counts puzzles, valid ones and puzzles with each kind of problem,
+             plus seconds and puzzles_per_second.
+    """
+    start = time.perf_counter()
+    results = [validate_grid(grid, word_scores, complexity, min_length) for grid in grids]
+    seconds = time.perf_counter() - start
+    summary = {"puzzles": len(results), "valid": sum(result["valid"] for result in results)}
+    for problem in ("unfilled", "unknown", "low_score", "duplicates"):
+        summary[problem] = sum(1 for result in results if result[problem])
+    summary["seconds"] = seconds
+    summary["puzzles_per_second"] = len(results) / seconds if seconds else 0.0
+    return results, summary
+
+def load_archive(path):
+    """
+    Reads archived puzzles, one JSON document per line as written by the export job
+    (or a bare list of row strings).
+
+    :return: List of grids as lists of row strings.
+    """
+    grids = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                puzzle = json.loads(line)
+                grids.append(puzzle["grid"] if isinstance(puzzle, dict) else puzzle)
+    return grids
+
+
+if __name__ == '__main__':
+    from bench_fill import LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Validate filled puzzles against a word list")
+    parser.add_argument("archive", nargs="?", help="JSON lines file of puzzles; omitted to run a throughput demo")
+    parser.add_argument("--dict", default="spreadthewordlist_caps.dict")
+    parser.add_argument("--complexity", type=int, default=35)
+    args = parser.parse_args()
+
+    word_scores = read_word_scores(args.dict)
+    if args.archive:
+        grids = load_archive(args.archive)
+    else:
+        word_dict = build_word_dictionary(args.dict)
+        index = build_pattern_index(word_dict, args.complexity)
+        fills = [next(iter_fills(create_symmetrical_grid2(*LAYOUTS["wednesday 15x15"]), word_dict, args.complexity,
+                                 index=index, rng=random.Random(seed))) for seed in range(20)]
+        grids = [[''.join(row) for row in fill] for fill in fills] * 250
+
+    results, summary = validate_archive(grids, word_scores, args.complexity)
+    for i, result in enumerate(results):
+        if not result["valid"]:
+            problems = {key: result[key] for key in ("unfilled", "unknown", "low_score", "duplicates") if result[key]}
+            print(f"Puzzle {i}: {problems}")
+    print(summary)
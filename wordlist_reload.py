@@ -0,0 +1,222 @@
+# wordlist_reload.py
+import os
+import threading
+import time
+
+from anagrams import anagram_signature, build_anagram_index
+from fill_engine import build_pattern_index
+
+
+## DIFF
+
+def read_word_scores(file_path):
+    """
+    Reads a .dict word list into a mapping of word to score, in file order.
+    A word listed twice keeps its last score.
+
+    :param file_path: Path to the word list file.
+    :return: Dictionary {word: score}.
+    """
+    scores = {}
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            word, score_str = line.split(';')
+            scores[word] = int(score_str)
+    return scores
+
+def diff_word_lists(old_scores, new_scores):
+    """
+    Compares two word lists.
+
+    :return: Dictionary with 'inserted' {word: score}, 'deleted' {word: score} and
+             'rescored' {word: (old score, new score)}.
+    """
+    inserted = {word: score for word, score in new_scores.items() if word not in old_scores}
+    deleted = {word: score for word, score in old_scores.items() if word not in new_scores}
+    rescored = {word: (score, new_scores[word]) for word, score in old_scores.items()
+                if word in new_scores and new_scores[word] != score}
+    return {"inserted": inserted, "deleted": deleted, "rescored": rescored}
+
+def changed_lengths(diff):
+    """
+    Returns the word lengths touched by a diff.
+    """
+    return {len(word) for changes in diff.values() for word in changes}
+
+def apply_word_list_diff(word_dict, diff):
+    """
+    Applies a diff to a word dictionary without modifying it.
+
+    Only the buckets of touched lengths are rebuilt; the others are shared with the
+    old dictionary, so anything still reading the old dictionary is unaffected.
+
+    :param word_dict: Dictionary of words organized by length, as built by build_word_dictionary.
+    :param diff: Diff as returned by diff_word_lists.
+    :return: New dictionary of words organized by length.
+    """
+    new_dict = dict(word_dict)
+    removed = set(diff["deleted"]) | set(diff["rescored"])
+    additions = dict(diff["inserted"])
+    additions.update({word: new for word, (_, new) in diff["rescored"].items()})
+
+    for length in changed_lengths(diff):
+        bucket = [(word, score) for word, score in word_dict.get(length, []) if word not in removed]
+        bucket.extend((word, score) for word, score in additions.items() if len(word) == length)
+        if bucket:
+            new_dict[length] = bucket
+        else:
+            new_dict.pop(length, None)
+    return new_dict
+
+def apply_anagram_diff(anagram_index, diff, new_scores, complexity=0):
+    """
+    Applies a diff to an anagram index without modifying it, re-sorting only the touched signatures.
+
+    :return: New anagram index.
+    """
+    new_index = dict(anagram_index)
+    for signature in {anagram_signature(word) for changes in diff.values() for word in changes}:
+        words = [word for word in anagram_index.get(signature, []) if word in new_scores]
+        words.extend(word for changes in (diff["inserted"], diff["rescored"]) for word in changes
+                     if anagram_signature(word) == signature)
+        words = [word for word in dict.fromkeys(words) if new_scores[word] > complexity]
+        words.sort(key=lambda w: (-new_scores[w], w))
+        if words:
+            new_index[signature] = words
+        else:
+            new_index.pop(signature, None)
+    return new_index
+
+## REGISTRY
+
+class WordListRegistry:
+    """
+    Holds the current word list and everything derived from it as one immutable snapshot.
+
+    reload() diffs the file against the loaded version and builds a new snapshot that
+    shares every untouched length bucket and index entry with the old one, then swaps
+    it in with a single assignment. Fills read current() once when they start and keep
+    their snapshot, so they are never paused or changed underneath.
+    """
+
+    def __init__(self, file_path, complexities=(35,), anagram_complexity=None):
+        self.file_path = file_path
+        self.complexities = tuple(complexities)
+        self.anagram_complexity = anagram_complexity
+        self.lock = threading.Lock()
+        self.scores = read_word_scores(file_path)
+
+        word_dict = {}
+        for word, score in self.scores.items():
+            word_dict.setdefault(len(word), []).append((word, score))
+        self.snapshot = {
+            "version": 1,
+            "word_dict": word_dict,
+            "indexes": {complexity: build_pattern_index(word_dict, complexity) for complexity in self.complexities},
+            "anagram_index": (None if anagram_complexity is None
+                              else build_anagram_index(word_dict, anagram_complexity)),
+        }
+
+    def current(self):
+        """
+        Returns the current snapshot: version, word_dict, indexes by complexity and anagram_index.
+        """
+        return self.snapshot
+
+    def reload(self):
+        """
+        Re-reads the word list file and applies the changes incrementally.
+
+        :return: The diff applied, or None if the file is unchanged.
+        """
+        with self.lock:
+            new_scores = read_word_scores(self.file_path)
+            diff = diff_word_lists(self.scores, new_scores)
+            if not any(diff.values()):
+                return None
+
+            old = self.snapshot
+            word_dict = apply_word_list_diff(old["word_dict"], diff)
+            lengths = changed_lengths(diff)
+            indexes = {}
+            for complexity, index in old["indexes"].items():
+                changed = {length: word_dict.get(length, []) for length in lengths}
+                index = dict(index)
+                index.update(build_pattern_index(changed, complexity))
+                for length in lengths:
+                    if length not in word_dict:
+                        index.pop(length, None)
+                indexes[complexity] = index
+
+            anagram_index = old["anagram_index"]
+            if anagram_index is not None:
+                anagram_index = apply_anagram_diff(anagram_index, diff, new_scores, self.anagram_complexity)
+
+            self.scores = new_scores
+            self.snapshot = {
+                "version": old["version"] + 1,
+                "word_dict": word_dict,
+                "indexes": indexes,
+                "anagram_index": anagram_index,
+            }
+            return diff
+
+class WordListWatcher:
+    """
+    Polls a registry's word list file and reloads it when it changes.
+    """
+
+    def __init__(self, registry, interval=1.0, on_reload=None):
+        self.registry = registry
+        self.interval = interval
+        self.on_reload = on_reload
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def file_signature(self):
+        try:
+            stat = os.stat(self.registry.file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        last = self.file_signature()
+        while not self.stopped.wait(self.interval):
+            current = self.file_signature()
+            if current is None or current == last:
+                continue
+            try:
+                diff = self.registry.reload()
+            except (OSError, ValueError) as error:
+                # The editor may still be writing the file; try again on the next poll.
+                print("Word list reload failed:", error)
+                continue
+            last = current
+            if diff is not None and self.on_reload is not None:
+                self.on_reload(self.registry.current(), diff)
+
+
+if __name__ == '__main__':
+    registry = WordListRegistry('custom_wordlist.dict', anagram_complexity=25)
+    def report(snapshot, diff):
+        print(f"Reloaded version {snapshot['version']}: {len(diff['inserted'])} inserted, "
+              f"{len(diff['deleted'])} deleted, {len(diff['rescored'])} rescored")
+    watcher = WordListWatcher(registry, on_reload=report).start()
+    print("Watching custom_wordlist.dict, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()